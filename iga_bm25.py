@@ -0,0 +1,209 @@
+# Lexical (BM25) index for Iga's RAG
+# Inverted index kept alongside the vector store so exact names like handle_action always match
+
+import os
+import re
+import json
+import math
+import heapq
+import threading
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+MAX_QUERY_TERMS = 16  # rarest terms of a query that get scored
+MAX_POSTINGS = 500  # postings scored per search, rarest terms first
+COMPACT_RATIO = 2  # rewrite the log once it holds this many entries per live doc
+
+_TOKEN_RE = re.compile(r"[a-z0-9_]+")
+
+# Too common to say anything about a chunk; scoring them is most of the work
+STOPWORDS = frozenset("""
+a about after all also am an and any are as at be been but by can could did do does doing
+for from had has have he her here him his how i if in into is it its just let me more most
+my no not now of on or our out she should so some than that the their them then there these
+they this those to too up us was we were what when where which while who why will with would
+you your
+""".split())
+
+
+def tokenize(text):
+    """Lowercase word tokens; snake_case identifiers also yield their parts."""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        tokens.append(token)
+        if "_" in token:
+            tokens.extend(part for part in token.split("_") if part)
+    return tokens
+
+
+class BM25Index:
+    """In-memory inverted index with Okapi BM25 scoring, persisted as a JSONL log.
+
+    Holds only term statistics - documents themselves live in the vector store.
+    save() appends the documents changed since the last save as one record
+    ({"docs": {doc_id: terms or null}}); the log is rewritten as a snapshot
+    once superseded entries pile up.
+    """
+
+    def __init__(self, path=None, legacy_path=None):
+        self.path = path
+        self._lock = threading.RLock()
+        self._doc_terms = {}  # doc_id -> {term: tf}
+        self._doc_len = {}  # doc_id -> token count
+        self._postings = {}  # term -> {doc_id: tf}
+        self._total_len = 0
+        self._norms = None  # doc_id -> BM25 length normalization, rebuilt after writes
+        self._pending = {}  # doc_id -> terms (None if removed) not yet saved
+        self._log_entries = 0  # doc entries in the log, superseded ones included
+        if path and os.path.exists(path):
+            self._load()
+        elif legacy_path and os.path.exists(legacy_path):
+            self._load_legacy(legacy_path)
+
+    def __len__(self):
+        return len(self._doc_len)
+
+    @property
+    def dirty(self):
+        return bool(self._pending)
+
+    # ── persistence ──────────────────────────────────────────
+
+    def _load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            if data and not data.endswith(b"\n"):
+                # Torn final record from a crash mid-save: cut it so the next save appends cleanly
+                data = data[:data.rfind(b"\n") + 1]
+                with open(self.path, 'r+b') as f:
+                    f.truncate(len(data))
+            for line in data.splitlines():
+                for doc_id, terms in json.loads(line)["docs"].items():
+                    self._discard(doc_id)
+                    if terms is not None:
+                        self._insert(doc_id, terms)
+                    self._log_entries += 1
+        except Exception as e:
+            print(f"BM25: Could not load {self.path}: {e}")
+
+    def _load_legacy(self, legacy_path):
+        """Whole-file JSON index from before the log: load it, then save it as a log."""
+        try:
+            with open(legacy_path, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"BM25: Could not load {legacy_path}: {e}")
+            return
+        for doc_id, terms in data.get("docs", {}).items():
+            self._insert(doc_id, terms)
+        if self.path:
+            self._compact()
+            os.remove(legacy_path)
+
+    def _compact(self):
+        """Replace the log with one record per chunk of live documents."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        doc_ids = list(self._doc_terms)
+        with open(tmp_path, 'w') as f:
+            for start in range(0, len(doc_ids), 1000):
+                chunk = {doc_id: self._doc_terms[doc_id] for doc_id in doc_ids[start:start + 1000]}
+                f.write(json.dumps({"docs": chunk}) + "\n")
+        os.replace(tmp_path, self.path)
+        self._pending = {}
+        self._log_entries = len(doc_ids)
+
+    def save(self):
+        """Persist the documents changed since the last save."""
+        if not self.path or not self._pending:
+            return
+        with self._lock:
+            try:
+                if self._log_entries + len(self._pending) > COMPACT_RATIO * len(self._doc_terms) + 1000:
+                    self._compact()
+                    return
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, 'a') as f:
+                    f.write(json.dumps({"docs": self._pending}) + "\n")
+                self._log_entries += len(self._pending)
+                self._pending = {}
+            except Exception as e:
+                print(f"BM25: Could not save {self.path}: {e}")
+
+    # ── writes ───────────────────────────────────────────────
+
+    def _insert(self, doc_id, terms):
+        self._doc_terms[doc_id] = terms
+        length = sum(terms.values())
+        self._doc_len[doc_id] = length
+        self._total_len += length
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+        self._norms = None
+
+    def _discard(self, doc_id):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return False
+        self._total_len -= self._doc_len.pop(doc_id, 0)
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+        self._norms = None
+        return True
+
+    def add(self, doc_ids, documents):
+        """Index (or re-index) documents by id."""
+        with self._lock:
+            for doc_id, text in zip(doc_ids, documents):
+                self._discard(doc_id)
+                terms = {}
+                for token in tokenize(text or ""):
+                    terms[token] = terms.get(token, 0) + 1
+                self._insert(doc_id, terms)
+                self._pending[doc_id] = terms
+
+    def remove(self, doc_ids):
+        with self._lock:
+            for doc_id in doc_ids:
+                if self._discard(doc_id):
+                    self._pending[doc_id] = None
+
+    # ── reads ────────────────────────────────────────────────
+
+    def _length_norms(self):
+        if self._norms is None:
+            avg_len = self._total_len / len(self._doc_len) or 1.0
+            self._norms = {doc_id: BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len)
+                           for doc_id, length in self._doc_len.items()}
+        return self._norms
+
+    def search(self, query, top_k=10):
+        """Return [(doc_id, score)] for the best BM25 matches, highest first.
+
+        Stopwords are dropped and only the MAX_QUERY_TERMS rarest terms are
+        scored, rarest first, while their postings fit in MAX_POSTINGS. The
+        common terms that get cut carry little weight, so long conversational
+        queries cost about the same as short ones.
+        """
+        with self._lock:
+            n_docs = len(self._doc_len)
+            if not n_docs:
+                return []
+            postings = [p for p in (self._postings.get(t) for t in set(tokenize(query)) - STOPWORDS) if p]
+            postings = heapq.nsmallest(MAX_QUERY_TERMS, postings, key=len)
+            norms = self._length_norms()
+            scores = {}
+            budget = MAX_POSTINGS
+            for i, posting in enumerate(postings):
+                if i and len(posting) > budget:
+                    break  # the rarest term is always scored
+                budget -= len(posting)
+                idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5)) * (BM25_K1 + 1)
+                for doc_id, tf in posting.items():
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf / (tf + norms[doc_id])
+        return heapq.nlargest(top_k, scores.items(), key=lambda x: x[1])
@@ -0,0 +1,95 @@
+# Token accounting for Iga's prompt
+# A local estimator (no tokenizer download, no API call), cached per message, and budget trimming
+
+import re
+from functools import lru_cache
+
+_PIECE_RE = re.compile(r"[A-Za-z]+|\d+|\s+|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text):
+    """Approximate BPE token count of text (within ~10-15% for English and code).
+
+    Letter runs cost about one token per 4 characters, digits one per 3,
+    punctuation and other symbols one each, non-ASCII characters one each.
+    Whitespace is mostly absorbed into the next token; only long runs
+    (indentation) add to the count.
+    """
+    if not text:
+        return 0
+    tokens = 0
+    for piece in _PIECE_RE.findall(text):
+        first = piece[0]
+        if first.isspace():
+            tokens += len(piece) // 8
+        elif first.isascii() and first.isalpha():
+            tokens += (len(piece) + 3) // 4
+        elif first.isascii() and first.isdigit():
+            tokens += (len(piece) + 2) // 3
+        else:
+            tokens += 1
+    return tokens
+
+
+@lru_cache(maxsize=128)
+def text_tokens(text):
+    """estimate_tokens, memoized for strings that recur (system prompt, RAG context)."""
+    return estimate_tokens(text)
+
+
+MESSAGE_OVERHEAD_TOKENS = 4  # role and framing per message
+_message_cache = {}  # {message id: (content length, tokens)}
+_MESSAGE_CACHE_MAX = 4096
+
+
+def message_tokens(msg):
+    """Token estimate of a conversation message, cached by message id.
+
+    Messages without an id yet (not saved) are estimated each time.
+    """
+    content = msg.get("content") or ""
+    msg_id = msg.get("id")
+    cached = _message_cache.get(msg_id) if msg_id is not None else None
+    if cached and cached[0] == len(content):
+        return cached[1]
+    count = estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+    if msg_id is not None:
+        if len(_message_cache) >= _MESSAGE_CACHE_MAX:
+            _message_cache.clear()
+        _message_cache[msg_id] = (len(content), count)
+    return count
+
+
+def forget_message(msg_id):
+    """Drop the cached estimate for msg_id (its message was replaced under the same id)."""
+    _message_cache.pop(msg_id, None)
+
+
+def conversation_tokens(messages):
+    """Total estimate for the non-system messages."""
+    return sum(message_tokens(m) for m in messages if m.get("role") != "system")
+
+
+def fit_to_budget(messages, budget):
+    """Newest messages whose estimates fit in budget tokens, oldest first.
+
+    A leading summary message is kept while it fits, so trimming drops the
+    oldest raw turns rather than the compressed history. The latest message
+    is always kept and the result never starts with an assistant turn.
+    Returns (kept_messages, dropped_count).
+    """
+    if not messages:
+        return [], 0
+    head = messages[0] if messages[0].get("content", "").startswith("[CONVERSATION SUMMARY") else None
+    body = messages[1:] if head is not None else list(messages)
+    remaining = budget - (message_tokens(head) if head is not None else 0)
+    if remaining < 0:
+        head, body, remaining = None, list(messages), budget
+    start = len(body)
+    while start > 0 and (start == len(body) or message_tokens(body[start - 1]) <= remaining):
+        remaining -= message_tokens(body[start - 1])
+        start -= 1
+    kept = ([head] if head is not None else []) + body[start:]
+    while len(kept) > 1 and kept[0].get("role") == "assistant":
+        kept = kept[1:]
+    return kept, len(messages) - len(kept)
@@ -0,0 +1,116 @@
+# Embedding providers for Iga's RAG
+# OpenAI (default) or a fully local feature-hashing embedder for offline runs and tests
+
+import os
+import re
+import math
+import zlib
+
+try:
+    from openai import OpenAI
+    OPENAI_AVAILABLE = True
+except ImportError:
+    OPENAI_AVAILABLE = False
+
+from iga_http import get_http_client
+
+PROVIDERS = ("openai", "local")
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+OPENAI_EMBEDDING_MODEL = "text-embedding-3-small"
+LOCAL_EMBEDDING_DIM = 512
+
+_TOKEN_RE = re.compile(r"[a-z0-9_]+")
+
+
+class EmbeddingProvider:
+    """Turns a batch of texts into vectors.
+
+    name identifies the vector space: it is part of the embedding cache key
+    and selects the collection, so vectors from different providers never mix.
+    """
+
+    name = None
+    cacheable = True  # worth persisting in the embedding cache
+
+    def available(self):
+        return True
+
+    def embed(self, texts):
+        """Return one vector per text, in order."""
+        raise NotImplementedError
+
+
+class OpenAIEmbedder(EmbeddingProvider):
+    """OpenAI embeddings endpoint."""
+
+    def __init__(self, model=OPENAI_EMBEDDING_MODEL):
+        self.model = model
+        self.name = model
+        self._client = None
+
+    def available(self):
+        return OPENAI_AVAILABLE
+
+    def _get_client(self):
+        if self._client is None:
+            api_key = os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                raise ValueError("OPENAI_API_KEY not found in environment")
+            self._client = OpenAI(api_key=api_key, http_client=get_http_client())
+        return self._client
+
+    def embed(self, texts):
+        response = self._get_client().embeddings.create(model=self.model, input=texts)
+        vectors = [None] * len(texts)
+        for item in response.data:
+            vectors[item.index] = item.embedding
+        return vectors
+
+
+class HashingEmbedder(EmbeddingProvider):
+    """Local bag-of-words embedder using signed feature hashing.
+
+    Unigrams and bigrams are hashed (crc32, stable across processes) into a
+    fixed number of buckets with sublinear term-frequency weights, then the
+    vector is L2-normalized. No network, no model files, deterministic - good
+    enough for keyword-ish similarity and for exercising the RAG path offline.
+    """
+
+    cacheable = False  # recomputing is cheaper than a cache lookup
+
+    def __init__(self, dim=LOCAL_EMBEDDING_DIM):
+        self.dim = dim
+        self.name = f"local-hash-{dim}"
+
+    def _embed_one(self, text):
+        tokens = _TOKEN_RE.findall(text.lower())
+        counts = {}
+        for i, token in enumerate(tokens):
+            counts[token] = counts.get(token, 0) + 1
+            if i:
+                bigram = f"{tokens[i - 1]} {token}"
+                counts[bigram] = counts.get(bigram, 0) + 1
+
+        vector = [0.0] * self.dim
+        for feature, tf in counts.items():
+            h = zlib.crc32(feature.encode('utf-8'))
+            sign = 1.0 if h & 0x80000000 else -1.0
+            vector[h % self.dim] += sign * (1.0 + math.log(tf))
+
+        norm = math.sqrt(sum(v * v for v in vector))
+        if norm:
+            vector = [v / norm for v in vector]
+        return vector
+
+    def embed(self, texts):
+        return [self._embed_one(t) for t in texts]
+
+
+def get_provider(name=None):
+    """Provider by name, else IGA_EMBEDDINGS, else OpenAI."""
+    name = (name or os.getenv("IGA_EMBEDDINGS", "openai")).strip().lower()
+    if name == "local":
+        return HashingEmbedder()
+    if name == "openai":
+        return OpenAIEmbedder()
+    raise ValueError(f"Unknown embedding provider: {name} (expected one of {', '.join(PROVIDERS)})")
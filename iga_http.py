@@ -0,0 +1,180 @@
+# Shared HTTP transport for Iga's API clients (chat and embeddings)
+# One pooled keep-alive httpx client per process, optional HTTP/2, pre-warming and per-host connection metrics
+
+import os
+import time
+import threading
+from urllib.parse import urlsplit
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+try:
+    import h2  # noqa: F401 - httpx needs it for http2=True
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE_CONNECTIONS = 10
+KEEPALIVE_EXPIRY = 300   # seconds an idle pooled connection is kept
+CONNECT_TIMEOUT = 10
+REQUEST_TIMEOUT = 120
+KEEP_WARM_INTERVAL = 60  # ping a warmed host after this long without traffic
+KEEP_WARM_IDLE_LIMIT = 10 * KEEP_WARM_INTERVAL  # stop pinging once a host had no real traffic this long (asleep)
+
+_client = None
+_client_lock = threading.Lock()
+_metrics = {}  # {host: {...}}, see get_metrics()
+_metrics_lock = threading.Lock()
+_warm_hosts = {}  # {origin: last real request time (monotonic)}
+_last_warmed = {}  # {origin: last keep-warm ping (monotonic)}
+_keep_warm_thread = None
+_keep_warm_stop = threading.Event()
+
+
+def http2_enabled():
+    """HTTP/2 if h2 is installed, unless IGA_HTTP2=0."""
+    return HTTP2_AVAILABLE and os.getenv("IGA_HTTP2", "1") != "0"
+
+
+def _host_metrics(host):
+    stats = _metrics.get(host)
+    if stats is None:
+        stats = _metrics[host] = {"requests": 0, "errors": 0, "connections_opened": 0,
+                                  "tls_handshakes": 0, "seconds_to_headers": 0.0, "last_used": None}
+    return stats
+
+
+def _trace(host):
+    """httpcore trace callback: counts the connections and TLS handshakes a request needed."""
+    def trace(event_name, info):
+        if event_name == "connection.connect_tcp.complete":
+            with _metrics_lock:
+                _host_metrics(host)["connections_opened"] += 1
+        elif event_name == "connection.start_tls.complete":
+            with _metrics_lock:
+                _host_metrics(host)["tls_handshakes"] += 1
+    return trace
+
+
+def _on_request(request):
+    host = request.url.host
+    request.extensions["trace"] = _trace(host)
+    request.extensions["iga_started"] = time.monotonic()
+    origin = f"{request.url.scheme}://{request.url.netloc.decode('ascii')}"
+    if origin in _warm_hosts and not request.extensions.get("iga_warm"):
+        _warm_hosts[origin] = time.monotonic()
+
+
+def _on_response(response):
+    started = response.request.extensions.get("iga_started")
+    with _metrics_lock:
+        stats = _host_metrics(response.request.url.host)
+        stats["requests"] += 1
+        if response.status_code >= 500:
+            stats["errors"] += 1
+        if started is not None:
+            stats["seconds_to_headers"] += time.monotonic() - started
+        stats["last_used"] = time.time()
+
+
+def get_http_client():
+    """The process-wide pooled client, or None without httpx (callers then use their default)."""
+    global _client
+    if not HTTPX_AVAILABLE:
+        return None
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(
+                http2=http2_enabled(),
+                limits=httpx.Limits(max_connections=MAX_CONNECTIONS,
+                                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                                    keepalive_expiry=KEEPALIVE_EXPIRY),
+                timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+                event_hooks={"request": [_on_request], "response": [_on_response]},
+            )
+        return _client
+
+
+def _origin(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _warm(origin):
+    """Open (or refresh) a pooled connection to origin. The status code doesn't matter."""
+    _last_warmed[origin] = time.monotonic()
+    try:
+        # Marked so the ping doesn't count as traffic that keeps the host warm
+        get_http_client().head(origin + "/", timeout=CONNECT_TIMEOUT, extensions={"iga_warm": True})
+    except Exception:
+        with _metrics_lock:
+            _host_metrics(urlsplit(origin).hostname)["errors"] += 1
+
+
+def _hosts_to_warm(now):
+    """Warmed origins idle for KEEP_WARM_INTERVAL, except ones idle past KEEP_WARM_IDLE_LIMIT.
+
+    While the agent sleeps nothing calls the APIs, so the pings stop after a
+    while and the next real call reconnects.
+    """
+    return [origin for origin, used in list(_warm_hosts.items())
+            if now - used < KEEP_WARM_IDLE_LIMIT
+            and now - max(used, _last_warmed.get(origin, used)) >= KEEP_WARM_INTERVAL]
+
+
+def _keep_warm_loop():
+    while not _keep_warm_stop.wait(KEEP_WARM_INTERVAL / 2):
+        for origin in _hosts_to_warm(time.monotonic()):
+            _warm(origin)
+
+
+def prewarm(urls, keep_warm=False):
+    """Connect to each URL's host in the background so the first real call skips DNS/TCP/TLS.
+
+    With keep_warm, hosts are pinged again whenever they've been idle for
+    KEEP_WARM_INTERVAL, so the pooled connection doesn't go cold, until they've
+    gone KEEP_WARM_IDLE_LIMIT without real traffic. stop_keep_warm() ends it.
+    """
+    global _keep_warm_thread
+    if not HTTPX_AVAILABLE:
+        return
+    origins = [_origin(u) for u in urls if u]
+    for origin in origins:
+        _warm_hosts.setdefault(origin, time.monotonic())
+    threading.Thread(target=lambda: [_warm(o) for o in origins], name="http-prewarm", daemon=True).start()
+    if keep_warm and _keep_warm_thread is None:
+        _keep_warm_stop.clear()
+        _keep_warm_thread = threading.Thread(target=_keep_warm_loop, name="http-keep-warm", daemon=True)
+        _keep_warm_thread.start()
+
+
+def stop_keep_warm():
+    """Stop the keep-warm thread. Safe to call twice."""
+    global _keep_warm_thread
+    _keep_warm_stop.set()
+    thread, _keep_warm_thread = _keep_warm_thread, None
+    if thread is not None:
+        thread.join(timeout=CONNECT_TIMEOUT)
+
+
+def get_metrics():
+    """Per-host counters: requests, errors (5xx/failed warms), connections_opened,
+    tls_handshakes, seconds_to_headers (total), last_used (epoch).
+    requests - connections_opened is roughly how many reused a pooled connection."""
+    with _metrics_lock:
+        return {host: dict(stats) for host, stats in _metrics.items()}
+
+
+def format_metrics():
+    """One line per host, for /status."""
+    lines = []
+    for host, s in sorted(get_metrics().items()):
+        avg = s["seconds_to_headers"] / s["requests"] if s["requests"] else 0
+        lines.append(f"{host}: {s['requests']} req, {s['connections_opened']} conn, "
+                     f"{s['tls_handshakes']} TLS, {s['errors']} err, avg {avg * 1000:.0f}ms to headers")
+    return "\n".join(lines)
@@ -0,0 +1,134 @@
+# Console log pipeline for Iga
+# Callers enqueue (no lock, no disk); one background thread strips ANSI codes and appends to the log
+
+import os
+import re
+import queue
+import atexit
+import threading
+from datetime import datetime
+
+LOG_FILE = "data/console_log.txt"
+LOG_MAX_BYTES = 100000  # rotate to console_log.txt.1 past this size
+_ANSI_RE = re.compile(r'\033\[[0-9;]*m')
+
+_queue = queue.SimpleQueue()  # put() takes no Python-level lock
+_writer = None
+_writer_lock = threading.Lock()
+_renderer = None
+
+
+def _render_plain(msg):
+    print(msg, flush=True)
+
+
+def get_renderer():
+    """Console renderer, resolved once: prompt_toolkit for proper ANSI handling, else print()."""
+    global _renderer
+    if _renderer is None:
+        try:
+            from prompt_toolkit import print_formatted_text
+            from prompt_toolkit.formatted_text import ANSI
+
+            def _render_ansi(msg):
+                try:
+                    print_formatted_text(ANSI(msg))
+                except Exception:
+                    _render_plain(msg)
+            _renderer = _render_ansi
+        except ImportError:
+            _renderer = _render_plain
+    return _renderer
+
+
+class LogWriter(threading.Thread):
+    """Drains the queue into the log file, rotating by size (rename, never rewrite)."""
+
+    def __init__(self, path=None, max_bytes=None):
+        super().__init__(name="console-log-writer", daemon=True)
+        self.path = path or LOG_FILE
+        self.max_bytes = max_bytes or LOG_MAX_BYTES
+        self._file = None
+        self._size = 0
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+
+    def _rotate(self):
+        self._file.close()
+        os.replace(self.path, self.path + ".1")
+        self._open()
+
+    def _write(self, timestamp, msg):
+        line = f"{timestamp} | {_ANSI_RE.sub('', msg)}\n"
+        if self._file is None:
+            self._open()
+        if self._size and self._size + len(line) > self.max_bytes:
+            self._rotate()
+        self._file.write(line)
+        self._size += len(line.encode("utf-8"))
+
+    def run(self):
+        while True:
+            item = _queue.get()
+            done = []
+            # Write everything already queued, then flush the file once
+            while True:
+                try:
+                    if isinstance(item, threading.Event):
+                        done.append(item)  # flush() marker
+                    else:
+                        self._write(*item)
+                except Exception:
+                    pass  # Don't let logging break the app
+                try:
+                    item = _queue.get_nowait()
+                except queue.Empty:
+                    break
+            try:
+                if self._file is not None:
+                    self._file.flush()
+            except Exception:
+                pass
+            for event in done:
+                event.set()
+
+
+def _ensure_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = LogWriter()
+                _writer.start()
+                atexit.register(flush)
+
+
+def log(msg):
+    """Queue a line for the log file. Never blocks on disk."""
+    _queue.put((datetime.now().isoformat(), str(msg)))
+    if _writer is None:
+        _ensure_writer()
+
+
+def flush(timeout=2.0):
+    """Wait until everything queued so far is on disk."""
+    if _writer is None or not _writer.is_alive():
+        return
+    done = threading.Event()
+    _queue.put(done)
+    done.wait(timeout)
+
+
+def read_recent(n=50, path=LOG_FILE):
+    """Last n log lines, reaching into the rotated file if the current one is short."""
+    flush()
+    lines = []
+    for p in (path, path + ".1"):
+        if len(lines) >= n or not os.path.exists(p):
+            break
+        with open(p, "r", encoding="utf-8", errors="replace") as f:
+            lines = f.read().splitlines() + lines
+    return lines[-n:]
@@ -0,0 +1,253 @@
+# Key-value memory store for Iga (SAVE_MEMORY / READ_MEMORY)
+# SQLite holds the memories; every process keeps an in-memory index of them, and
+# iga_memory.json is exported as a mirror for RAG and scripts
+
+import os
+import json
+import atexit
+import sqlite3
+import threading
+from datetime import datetime
+
+MEMORY_DB_FILE = "iga_memory.db"
+MEMORY_FILE = "iga_memory.json"  # mirror; hand edits to it are merged back by key
+MIRROR_DELAY_SECONDS = 1.0  # coalesce bursts of writes into one mirror export
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+        return [st.st_mtime_ns, st.st_size]
+    except OSError:
+        return None
+
+
+def _entry_ts(entry):
+    return entry.get("ts") if isinstance(entry, dict) else None
+
+
+class MemoryStore:
+    """Memories keyed by name; entries are usually {"value": ..., "ts": iso}.
+
+    Reads are served from an in-memory dict. It is reloaded only when another
+    connection committed (PRAGMA data_version) or someone edited the JSON
+    mirror by hand. Puts and deletes are single-row SQLite writes. Prefix and
+    time-range queries use the primary key and the ts index.
+    Subscribers are called with the changed keys once the mirror is written.
+    """
+
+    def __init__(self, db_path=MEMORY_DB_FILE, mirror_path=MEMORY_FILE):
+        self.mirror_path = mirror_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; only the last commits can be lost on power failure
+        self._conn.execute("CREATE TABLE IF NOT EXISTS memories (key TEXT PRIMARY KEY, data TEXT, ts TEXT)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS memories_ts ON memories(ts)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+        self._cache = None
+        self._data_version = None
+        self._mirror_stamp = None
+        self._subscribers = []
+        self._changed = set()
+        self._timer = None
+
+    # ── cache ────────────────────────────────────────────────
+
+    def _meta(self, key):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set_mirror_stamp(self, stamp):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('mirror_stamp', ?)", (json.dumps(stamp),))
+        self._mirror_stamp = stamp
+
+    def _refresh(self):
+        """Make the cache current. Caller holds the lock."""
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if self._cache is None or data_version != self._data_version:
+            self._cache = {key: json.loads(data) for key, data in
+                           self._conn.execute("SELECT key, data FROM memories")}
+            self._data_version = data_version
+            self._mirror_stamp = self._meta("mirror_stamp")
+        mirror = _file_stamp(self.mirror_path)
+        if mirror is not None and mirror != self._mirror_stamp:
+            self._import_mirror(mirror)
+
+    def _import_mirror(self, stamp):
+        """The mirror changed since our last export (first run, or edited by hand) - merge it in.
+
+        Merged by key: entries in the file are added or updated, nothing is
+        deleted (the file may predate keys other processes wrote since). Keys
+        changed here but not exported yet keep their local value.
+        """
+        try:
+            with open(self.mirror_path, 'r') as f:
+                content = f.read().strip()
+            mem = json.loads(content) if content else {}
+        except Exception as e:
+            print(f"Memory: Could not import {self.mirror_path}: {e}")
+            mem = None
+        with self._conn:
+            if isinstance(mem, dict):
+                updates = {k: v for k, v in mem.items()
+                           if k not in self._changed and self._cache.get(k) != v}
+                self._conn.executemany("INSERT OR REPLACE INTO memories (key, data, ts) VALUES (?, ?, ?)",
+                                       [(k, json.dumps(v), _entry_ts(v)) for k, v in updates.items()])
+                self._cache.update(updates)
+                changed = set(updates) | (set(self._cache) ^ set(mem))
+                if changed:
+                    self._schedule_export(changed)  # notify, and bring the mirror up to the merged state
+            self._set_mirror_stamp(stamp)
+
+    # ── mirror export ────────────────────────────────────────
+
+    def _schedule_export(self, keys):
+        self._changed.update(keys)
+        if self._timer is None:
+            self._timer = threading.Timer(MIRROR_DELAY_SECONDS, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Write the JSON mirror now if there are unexported changes."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._changed:
+                return
+            self._refresh()  # include what other processes wrote since our last read
+            changed, self._changed = self._changed, set()
+            try:
+                tmp_path = self.mirror_path + ".tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(self._cache, f, indent=2)
+                os.replace(tmp_path, self.mirror_path)
+                with self._conn:
+                    self._set_mirror_stamp(_file_stamp(self.mirror_path))
+            except Exception as e:
+                print(f"Memory: Could not write {self.mirror_path}: {e}")
+                return
+        for callback in list(self._subscribers):
+            try:
+                callback(changed)
+            except Exception as e:
+                print(f"Memory: Subscriber failed: {e}")
+
+    def subscribe(self, callback):
+        """Call callback(changed_keys) after changes reach the JSON mirror."""
+        self._subscribers.append(callback)
+
+    # ── reads ────────────────────────────────────────────────
+
+    def get(self, key, default=None):
+        with self._lock:
+            self._refresh()
+            return self._cache.get(key, default)
+
+    def __contains__(self, key):
+        with self._lock:
+            self._refresh()
+            return key in self._cache
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._cache)
+
+    def keys(self):
+        with self._lock:
+            self._refresh()
+            return list(self._cache)
+
+    def all(self):
+        """Snapshot of every memory as {key: entry} (a shallow copy)."""
+        with self._lock:
+            self._refresh()
+            return dict(self._cache)
+
+    def with_prefix(self, prefix):
+        """{key: entry} for keys starting with prefix, in key order."""
+        with self._lock:
+            self._refresh()
+            rows = self._conn.execute(
+                "SELECT key FROM memories WHERE key >= ? AND key < ? ORDER BY key",
+                (prefix, prefix + "\U0010ffff")).fetchall()
+            return {key: self._cache[key] for (key,) in rows if key in self._cache}
+
+    def between(self, start=None, end=None):
+        """{key: entry} with start <= ts < end (ISO strings or datetimes), oldest first."""
+        start = start.isoformat() if isinstance(start, datetime) else start
+        end = end.isoformat() if isinstance(end, datetime) else end
+        with self._lock:
+            self._refresh()
+            rows = self._conn.execute(
+                "SELECT key FROM memories WHERE ts IS NOT NULL AND ts >= ? AND ts < ? ORDER BY ts",
+                (start or "", end or "\U0010ffff")).fetchall()
+            return {key: self._cache[key] for (key,) in rows if key in self._cache}
+
+    # ── writes ───────────────────────────────────────────────
+
+    def set_entry(self, key, entry):
+        """Store a raw entry under key."""
+        with self._lock:
+            self._refresh()
+            with self._conn:
+                self._conn.execute("INSERT OR REPLACE INTO memories (key, data, ts) VALUES (?, ?, ?)",
+                                   (key, json.dumps(entry), _entry_ts(entry)))
+            self._cache[key] = entry
+            self._schedule_export([key])
+
+    def put(self, key, value):
+        """Save value under key, timestamped now."""
+        self.set_entry(key, {"value": value, "ts": datetime.now().isoformat()})
+
+    def delete(self, key):
+        with self._lock:
+            self._refresh()
+            if key not in self._cache:
+                return False
+            with self._conn:
+                self._conn.execute("DELETE FROM memories WHERE key = ?", (key,))
+            del self._cache[key]
+            self._schedule_export([key])
+            return True
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self.get(key, default)
+            self.delete(key)
+            return entry
+
+    def merge(self, mem, delete=()):
+        """Add or update the {key: entry} pairs in mem and delete the keys in delete.
+
+        Keys in neither are left alone, so writes by other processes survive.
+        """
+        with self._lock:
+            self._refresh()
+            removed = [k for k in delete if k in self._cache and k not in mem]
+            with self._conn:
+                self._conn.executemany("INSERT OR REPLACE INTO memories (key, data, ts) VALUES (?, ?, ?)",
+                                       [(k, json.dumps(v), _entry_ts(v)) for k, v in mem.items()])
+                self._conn.executemany("DELETE FROM memories WHERE key = ?", [(k,) for k in removed])
+            self._cache.update(mem)
+            for k in removed:
+                del self._cache[k]
+            self._schedule_export(set(mem) | set(removed))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_memory_store():
+    """The process-wide memory store (its mirror is flushed at exit)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MemoryStore()
+            atexit.register(_store.flush)
+        return _store
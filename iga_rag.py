@@ -1,43 +1,62 @@
 # RAG module for Iga - Retrieval Augmented Generation
-# Uses ChromaDB for vector storage and OpenAI embeddings
+# Uses a pluggable vector store (ChromaDB or NumPy, see iga_vectorstore) and embedding provider (see iga_embeddings)
 
 import os
+import re
+import ast
 import json
 import hashlib
+import sqlite3
+import queue
+import threading
+import time
+from array import array
 from datetime import datetime
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# ChromaDB and OpenAI imports
-try:
-    import chromadb
-    from chromadb.config import Settings
-    CHROMADB_AVAILABLE = True
-except ImportError:
-    CHROMADB_AVAILABLE = False
-    print("Warning: chromadb not installed. RAG features disabled.")
-
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    print("Warning: openai not installed. RAG features disabled.")
+# Vector store and embedding provider imports
+from iga_vectorstore import CHROMADB_AVAILABLE, NUMPY_AVAILABLE, NUMPY_STORE_DIR, default_backend, open_store
+from iga_embeddings import OPENAI_AVAILABLE, OPENAI_EMBEDDING_MODEL, get_provider
+from iga_bm25 import BM25Index
+if not CHROMADB_AVAILABLE and not NUMPY_AVAILABLE:
+    print("Warning: neither chromadb nor numpy installed. RAG features disabled.")
 
 # Configuration
 CHROMA_PERSIST_DIR = ".iga_chroma"
 COLLECTION_NAME = "iga_knowledge"
-EMBEDDING_MODEL = "text-embedding-3-small"
 CHUNK_SIZE = 1000  # characters per chunk
 CHUNK_OVERLAP = 200  # overlap between chunks
+MAX_STRUCTURED_CHUNK = 1500  # .py/.md chunks follow code/heading boundaries up to this size
+CHUNKER_VERSION = 2  # bump to re-chunk files indexed by an older chunker
+EMBED_BATCH_SIZE = 256  # max inputs per embeddings request
+EMBED_BATCH_TOKENS = 200000  # stay under the endpoint's per-request token cap
+ADD_BATCH_SIZE = 1000  # max rows per collection write
 RAG_STATE_FILE = ".iga_chroma/rag_state.json"
+INDEX_MANIFEST_NAME = "index_manifest"  # path -> mtime/size/hash/chunk ids, kept next to each backend's data
+BM25_INDEX_NAME = "bm25_index"  # lexical index over the same chunks
+RRF_K = 60  # reciprocal rank fusion constant
+INDEXER_POLL_SECONDS = 30  # background indexer rescan interval (stat-only)
+INDEXER_DEBOUNCE_SECONDS = 2  # wait for writes to settle before re-embedding
+EMBED_CACHE_FILE = ".iga_embed_cache.db"  # content-addressed; outside the store dirs so wiping them keeps it
+LEGACY_EMBED_CACHE_FILE = ".iga_chroma/embedding_cache.db"
 
 # Global state
-_client = None
+_backend = None
 _collection = None
-_openai_client = None
+_collection_name = COLLECTION_NAME
+_provider = None  # active EmbeddingProvider (see iga_embeddings)
+_lexical = None  # BM25Index over the same chunks as _collection
 _initialized = False
+_index_version = 0  # bumped whenever the collection changes; lets callers invalidate caches
+_embed_cache = None
+_embed_cache_lock = threading.Lock()
+_index_lock = threading.RLock()  # one indexing pass at a time (manifest is read-modify-write)
+_indexer_thread = None
+_indexer_queue = queue.Queue()  # changed paths, or _FULL_SCAN
+_indexer_stop = threading.Event()
+_FULL_SCAN = object()
 
 # Files to index - now discovered automatically
 # Keeping this for any priority files that should always be indexed first
@@ -48,31 +67,145 @@ FILES_TO_INDEX = [
 ]
 
 
-def _get_openai_client():
-    """Get or create OpenAI client."""
-    global _openai_client
-    if _openai_client is None:
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY not found in environment")
-        _openai_client = OpenAI(api_key=api_key)
-    return _openai_client
+def _get_provider():
+    """Get the active embedding provider (IGA_EMBEDDINGS, default OpenAI)."""
+    global _provider
+    if _provider is None:
+        _provider = get_provider()
+    return _provider
 
 
-def _embed_text(text):
-    """Generate embedding for text using OpenAI."""
-    if not OPENAI_AVAILABLE:
-        return None
+def _estimate_tokens(text):
+    """Cheap token estimate (~4 chars per token) for batch sizing."""
+    return len(text) // 4 + 1
+
+
+def _batch_texts(texts, max_items=EMBED_BATCH_SIZE, max_tokens=EMBED_BATCH_TOKENS):
+    """Yield (start, batch) slices of texts bounded by item count and token estimate."""
+    start = 0
+    while start < len(texts):
+        end = start
+        tokens = 0
+        while end < len(texts) and end - start < max_items:
+            tokens += _estimate_tokens(texts[end])
+            if end > start and tokens > max_tokens:
+                break
+            end += 1
+        yield start, texts[start:end]
+        start = end
+
+
+def _get_embed_cache():
+    """Get or open the on-disk embedding cache (SQLite)."""
+    global _embed_cache
+    if _embed_cache is None:
+        if not os.path.exists(EMBED_CACHE_FILE) and os.path.exists(LEGACY_EMBED_CACHE_FILE):
+            # Older layout kept the cache inside .iga_chroma; move it (and any WAL) out
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(LEGACY_EMBED_CACHE_FILE + suffix):
+                    os.replace(LEGACY_EMBED_CACHE_FILE + suffix, EMBED_CACHE_FILE + suffix)
+        conn = sqlite3.connect(EMBED_CACHE_FILE, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                created_at TEXT NOT NULL
+            )
+        """)
+        conn.commit()
+        _embed_cache = conn
+    return _embed_cache
+
+
+def _embed_cache_key(text, model):
+    """Cache key: hash of model name plus exact chunk text."""
+    return hashlib.sha256(f"{model}\0{text}".encode('utf-8')).hexdigest()
+
+
+def _cache_lookup(keys):
+    """Return {key: embedding} for keys already in the cache."""
+    found = {}
     try:
-        client = _get_openai_client()
-        response = client.embeddings.create(
-            model=EMBEDDING_MODEL,
-            input=text
-        )
-        return response.data[0].embedding
+        with _embed_cache_lock:
+            conn = _get_embed_cache()
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array('f', blob).tolist()
     except Exception as e:
-        print(f"Embedding error: {e}")
-        return None
+        print(f"RAG: Embedding cache read failed: {e}")
+    return found
+
+
+def _cache_store(items, model):
+    """Persist (key, embedding) pairs to the cache."""
+    if not items:
+        return
+    now = datetime.now().isoformat()
+    try:
+        with _embed_cache_lock:
+            conn = _get_embed_cache()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, vector, created_at) VALUES (?, ?, ?, ?)",
+                [(key, model, array('f', emb).tobytes(), now) for key, emb in items]
+            )
+            conn.commit()
+    except Exception as e:
+        print(f"RAG: Embedding cache write failed: {e}")
+
+
+def _embed_texts(texts):
+    """Generate embeddings for many texts, batching requests to the endpoint.
+
+    The embedding cache is consulted first so unchanged chunks cost no API call;
+    misses go to the active provider.
+    Returns a list aligned with texts; entries are None where embedding failed.
+    """
+    embeddings = [None] * len(texts)
+    if not texts:
+        return embeddings
+
+    provider = _get_provider()
+    if not provider.cacheable:
+        return provider.embed(texts)
+
+    keys = [_embed_cache_key(t, provider.name) for t in texts]
+    cached = _cache_lookup(list(set(keys)))
+    missing = []
+    for i, key in enumerate(keys):
+        if key in cached:
+            embeddings[i] = cached[key]
+        else:
+            missing.append(i)
+    if not missing or not provider.available():
+        return embeddings
+
+    # Embed each distinct missing text once
+    unique_missing = list(dict.fromkeys(texts[i] for i in missing))
+    fresh = {}
+    for start, batch in _batch_texts(unique_missing):
+        try:
+            for text, vector in zip(batch, provider.embed(batch)):
+                if vector is not None:
+                    fresh[text] = vector
+        except Exception as e:
+            print(f"Embedding error ({len(batch)} texts): {e}")
+
+    for i in missing:
+        embeddings[i] = fresh.get(texts[i])
+    _cache_store([(_embed_cache_key(t, provider.name), e) for t, e in fresh.items()], provider.name)
+    return embeddings
+
+
+def _embed_text(text):
+    """Generate embedding for a single text."""
+    return _embed_texts([text])[0]
 
 
 def _chunk_text(text, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
@@ -92,6 +225,91 @@ def _chunk_text(text, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
     return chunks
 
 
+def _pack_segments(segments, max_size=MAX_STRUCTURED_CHUNK):
+    """Merge consecutive segments into chunks up to max_size; oversized ones fall back to windows."""
+    chunks = []
+    current = ""
+    for segment in segments:
+        if not segment.strip():
+            continue
+        if len(segment) > max_size:
+            if current.strip():
+                chunks.append(current)
+            current = ""
+            chunks.extend(_chunk_text(segment, chunk_size=max_size))
+        elif len(current) + len(segment) > max_size:
+            if current.strip():
+                chunks.append(current)
+            current = segment
+        else:
+            current += segment
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+
+def _split_lines_at(lines, starts):
+    """Split a list of lines into segments beginning at the given 0-based line indexes."""
+    bounds = sorted(set(i for i in starts if 0 < i < len(lines)))
+    segments = []
+    prev = 0
+    for i in bounds + [len(lines)]:
+        segments.append("".join(lines[prev:i]))
+        prev = i
+    return segments
+
+
+def _node_start(node):
+    """First line (0-based) of a def/class, including decorators."""
+    return min([node.lineno] + [d.lineno for d in getattr(node, 'decorator_list', [])]) - 1
+
+
+def _split_python(text, max_size=MAX_STRUCTURED_CHUNK):
+    """Split Python source at top-level function/class boundaries (methods for big classes)."""
+    tree = ast.parse(text)
+    lines = text.splitlines(keepends=True)
+    defs = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+    starts = []
+    for node in tree.body:
+        if not isinstance(node, defs):
+            continue
+        starts.append(_node_start(node))
+        if isinstance(node, ast.ClassDef):
+            size = sum(len(l) for l in lines[_node_start(node):node.end_lineno])
+            if size > max_size:
+                starts.extend(_node_start(child) for child in node.body if isinstance(child, defs))
+        starts.append(node.end_lineno)  # code after a def starts a new segment
+    return _split_lines_at(lines, starts)
+
+
+_HEADING_RE = re.compile(r"^#{1,6}\s")
+
+
+def _split_markdown(text):
+    """Split Markdown at headings (ignoring # lines inside fenced code)."""
+    lines = text.splitlines(keepends=True)
+    starts = []
+    in_fence = False
+    for i, line in enumerate(lines):
+        if line.lstrip().startswith(("```", "~~~")):
+            in_fence = not in_fence
+        elif not in_fence and _HEADING_RE.match(line):
+            starts.append(i)
+    return _split_lines_at(lines, starts)
+
+
+def _chunk_file(filepath, text):
+    """Structure-aware chunking: code/heading boundaries for .py/.md, fixed windows otherwise."""
+    try:
+        if filepath.endswith('.py'):
+            return _pack_segments(_split_python(text))
+        if filepath.endswith('.md'):
+            return _pack_segments(_split_markdown(text))
+    except (SyntaxError, ValueError):
+        pass  # Unparseable source - fall back to windows
+    return _chunk_text(text)
+
+
 def _content_hash(content):
     """Generate hash of content for change detection."""
     return hashlib.md5(content.encode('utf-8')).hexdigest()
@@ -108,15 +326,12 @@ def _get_git_head():
 
 
 def _get_archive_line_count():
-    """Get line count of message archive for change detection."""
-    archive_path = "iga_message_archive.jsonl"
+    """Get message count of the archive for change detection (O(1) via its checkpoint)."""
     try:
-        if os.path.exists(archive_path):
-            with open(archive_path, 'r') as f:
-                return sum(1 for _ in f)
-    except:
-        pass
-    return 0
+        from tools.message_archive import get_archive_count
+        return get_archive_count()
+    except Exception:
+        return 0
 
 
 def _load_rag_state():
@@ -140,6 +355,70 @@ def _save_rag_state(state):
         print(f"RAG: Could not save state: {e}")
 
 
+def _store_file(name):
+    """Path for a JSON sidecar of the active collection, next to its backend's data."""
+    store_dir = NUMPY_STORE_DIR if _backend == "numpy" else CHROMA_PERSIST_DIR
+    if _collection_name == COLLECTION_NAME:
+        return os.path.join(store_dir, f"{name}.json")
+    return os.path.join(store_dir, f"{name}_{_collection_name}.json")
+
+
+def _manifest_file():
+    """Manifest path for the active collection (each backend has its own index)."""
+    return _store_file(INDEX_MANIFEST_NAME)
+
+
+def _load_manifest():
+    """Load the per-file index manifest ({path: {mtime, size, content_hash, chunk_ids}})."""
+    try:
+        if os.path.exists(_manifest_file()):
+            with open(_manifest_file(), 'r') as f:
+                return json.load(f)
+    except Exception:
+        pass
+    return {}
+
+
+def _save_manifest(manifest):
+    """Save the index manifest atomically (temp file + rename)."""
+    try:
+        manifest_file = _manifest_file()
+        os.makedirs(os.path.dirname(manifest_file), exist_ok=True)
+        tmp_path = manifest_file + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, manifest_file)
+    except Exception as e:
+        print(f"RAG: Could not save manifest: {e}")
+
+
+def _seed_manifest_from_collection():
+    """Build a manifest from existing collection metadata with one bulk query.
+
+    Used once when upgrading an index that predates the manifest. Entries get
+    no stat info, so each file is read and hashed once on the next reindex.
+    """
+    manifest = {}
+    try:
+        existing = _collection.get(include=["metadatas"])
+    except Exception as e:
+        print(f"RAG: Could not seed manifest: {e}")
+        return manifest
+    for doc_id, meta in zip(existing.get('ids') or [], existing.get('metadatas') or []):
+        source = (meta or {}).get('source_file')
+        if not source or source.startswith('message_archive'):
+            continue
+        entry = manifest.setdefault(os.path.normpath(source), {
+            "source_file": source,
+            "mtime": None,
+            "size": None,
+            "content_hash": meta.get('content_hash'),
+            "chunk_ids": [],
+        })
+        entry["chunk_ids"].append(doc_id)
+    return manifest
+
+
 def needs_reindex(message_threshold=50):
     """Check if reindexing is needed. Only reindex after message_threshold new messages."""
     state = _load_rag_state()
@@ -166,52 +445,83 @@ def mark_indexed():
     _save_rag_state(state)
 
 
+INDEXABLE_EXTENSIONS = ('.py', '.txt', '.md', '.json')
+SKIP_DIRS = {'.git', 'node_modules', 'venv', '__pycache__', 'chroma_db', '.chroma', 'sibling',
+             'iga_message_archive'}  # the archive is indexed on its own; its catalog changes every flush
+SKIP_FILES = {'console_log.txt'}  # Too noisy for RAG
+MAX_FILE_SIZE = 100000  # 100KB limit
+
+
 def _discover_all_files():
     """Find all indexable files (.py, .txt, .md) recursively."""
     all_files = []
-    skip_dirs = {'.git', 'node_modules', 'venv', '__pycache__', 'chroma_db', '.chroma', 'sibling'}
-    skip_files = {'console_log.txt'}  # Too noisy for RAG
-    
+
     for root, dirs, files in os.walk('.'):
         # Skip hidden and build directories
-        dirs[:] = [d for d in dirs if d not in skip_dirs and not d.startswith('.')]
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith('.')]
         
         for fname in files:
-            if fname in skip_files:
+            if fname in SKIP_FILES:
                 continue
-            if fname.endswith(('.py', '.txt', '.md', '.json')):
+            if fname.endswith(INDEXABLE_EXTENSIONS):
                 path = os.path.join(root, fname)
                 # Skip very large files and binary-ish json
-                if os.path.getsize(path) < 100000:  # 100KB limit
+                if os.path.getsize(path) < MAX_FILE_SIZE:
                     all_files.append(path)
     
     return all_files
 
 
-def init_rag():
-    """Initialize ChromaDB with persistent storage."""
-    global _client, _collection, _initialized
-
-    if not CHROMADB_AVAILABLE or not OPENAI_AVAILABLE:
-        print("RAG: Missing dependencies (chromadb or openai)")
+def _is_indexable(path):
+    """Same rules as _discover_all_files, for a single (existing) path."""
+    normalized = os.path.normpath(path)
+    if normalized in {os.path.normpath(f) for f in FILES_TO_INDEX}:
+        return os.path.exists(normalized)
+    if os.path.isabs(normalized) or normalized.startswith('..'):
+        return False
+    parts = normalized.split(os.sep)
+    if any(d in SKIP_DIRS or d.startswith('.') for d in parts[:-1]):
+        return False
+    if parts[-1] in SKIP_FILES or not parts[-1].endswith(INDEXABLE_EXTENSIONS):
         return False
-
     try:
-        # Create persistent directory
-        os.makedirs(CHROMA_PERSIST_DIR, exist_ok=True)
+        return os.path.getsize(normalized) < MAX_FILE_SIZE
+    except OSError:
+        return False
+
 
-        # Initialize ChromaDB with persistence
-        _client = chromadb.PersistentClient(path=CHROMA_PERSIST_DIR)
+def init_rag(backend=None, embeddings=None):
+    """Initialize the vector store with persistent storage.
+
+    backend is "chroma" or "numpy"; defaults to IGA_VECTOR_STORE, else
+    chroma when installed, else numpy. embeddings is "openai" or "local";
+    defaults to IGA_EMBEDDINGS, else openai. Each embedding provider gets
+    its own collection since their vectors aren't comparable.
+    """
+    global _backend, _collection, _collection_name, _provider, _lexical, _initialized
+
+    backend = backend or default_backend()
+    try:
+        provider = get_provider(embeddings)
+    except ValueError as e:
+        print(f"RAG: {e}")
+        return False
+    if backend is None or not provider.available():
+        print("RAG: Missing dependencies (chromadb/numpy or embedding provider)")
+        return False
 
-        # Get or create collection with OpenAI embedding function
-        # We'll use our own embedding function for more control
-        _collection = _client.get_or_create_collection(
-            name=COLLECTION_NAME,
-            metadata={"hnsw:space": "cosine"}
-        )
+    collection_name = COLLECTION_NAME
+    if provider.name != OPENAI_EMBEDDING_MODEL:
+        collection_name = f"{COLLECTION_NAME}_{provider.name.replace('-', '_')}"
 
+    try:
+        _collection = open_store(backend, collection_name, CHROMA_PERSIST_DIR)
+        _backend = backend
+        _collection_name = collection_name
+        _provider = provider
+        _lexical = _load_lexical_index()
         _initialized = True
-        print(f"RAG: Initialized (collection has {_collection.count()} documents)")
+        print(f"RAG: Initialized {backend} store with {provider.name} embeddings (collection has {_collection.count()} documents)")
         return True
 
     except Exception as e:
@@ -220,180 +530,529 @@ def init_rag():
         return False
 
 
-def index_files(force_reindex=False):
-    """Index Iga's files into ChromaDB."""
-    global _collection
+def _bump_index_version():
+    """Record that the collection contents changed."""
+    global _index_version
+    _index_version += 1
 
-    if not _initialized or _collection is None:
-        print("RAG: Not initialized, call init_rag() first")
-        return {"indexed": 0, "skipped": 0, "errors": []}
 
-    stats = {"indexed": 0, "skipped": 0, "errors": []}
+def get_index_version():
+    """Monotonic counter of collection changes in this process."""
+    return _index_version
 
-    # Build list of files to index
-    files = FILES_TO_INDEX.copy()
-    files.extend(_discover_all_files())
 
-    # Remove duplicates while preserving order
-    seen = set()
-    unique_files = []
-    for f in files:
-        normalized = os.path.normpath(f)
-        if normalized not in seen:
-            seen.add(normalized)
-            unique_files.append(f)
+def _load_lexical_index():
+    """Open the BM25 index for the active collection, rebuilding it if missing."""
+    legacy_path = _store_file(BM25_INDEX_NAME)  # whole-file JSON, migrated to the log
+    lexical = BM25Index(os.path.splitext(legacy_path)[0] + ".jsonl", legacy_path=legacy_path)
+    if len(lexical) == 0 and _collection.count() > 0:
+        existing = _collection.get(include=["documents"])
+        lexical.add(existing.get('ids') or [], existing.get('documents') or [])
+        lexical.save()
+        print(f"RAG: Built lexical index ({len(lexical)} chunks)")
+    return lexical
 
-    for filepath in unique_files:
-        if not os.path.exists(filepath):
-            continue
 
-        try:
-            # Read file content
-            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
+def _delete_chunks(ids):
+    """Remove chunks from the vector store and the lexical index."""
+    if not ids:
+        return
+    _collection.delete(ids=ids)
+    if _lexical is not None:
+        _lexical.remove(ids)
+    _bump_index_version()
 
-            if not content.strip():
-                continue
 
-            # Check if file has changed since last index
-            content_hash = _content_hash(content)
-            file_id_base = filepath.replace('/', '_').replace('.', '_')
-
-            # For JSON files, extract meaningful content
-            if filepath.endswith('.json'):
-                try:
-                    data = json.loads(content)
-                    # For iga_memory.json, extract memory entries
-                    if isinstance(data, dict):
-                        lines = []
-                        for key, value in data.items():
-                            if isinstance(value, dict) and 'value' in value:
-                                lines.append(f"[{key}]: {value['value']}")
-                            else:
-                                lines.append(f"[{key}]: {json.dumps(value)}")
-                        content = "\n".join(lines)
-                except json.JSONDecodeError:
-                    pass  # Use raw content
-
-            # Check existing documents for this file
-            existing = _collection.get(
-                where={"source_file": filepath},
-                include=["metadatas"]
-            )
+def upsert_chunks(ids, embeddings, documents, metadatas):
+    """Write chunks to the vector store and the lexical index together."""
+    _collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+    if _lexical is not None:
+        _lexical.add(ids, documents)
+        _lexical.save()
+    _bump_index_version()
+
+
+def _flush_pending(pending, manifest):
+    """Embed queued chunks in batches and write them to the collection in bulk.
+
+    Clears pending in place. Returns the number of chunks written. A file with
+    any chunk that failed to embed or write has its manifest stat and hash
+    cleared, so the next pass indexes it again instead of skipping it.
+    """
+    if not pending:
+        return 0
 
-            # Skip if content hasn't changed
-            if existing['ids'] and not force_reindex:
-                existing_hash = existing['metadatas'][0].get('content_hash') if existing['metadatas'] else None
-                if existing_hash == content_hash:
-                    stats["skipped"] += 1
-                    continue
-                else:
-                    # Delete old chunks before re-indexing
-                    _collection.delete(ids=existing['ids'])
-
-            # Chunk the content
-            chunks = _chunk_text(content)
-
-            # Index each chunk
-            for i, chunk in enumerate(chunks):
-                doc_id = f"{file_id_base}_chunk_{i}"
-
-                # Generate embedding
-                embedding = _embed_text(chunk)
-                if embedding is None:
-                    continue
-
-                # Add to collection
-                _collection.add(
-                    ids=[doc_id],
-                    embeddings=[embedding],
-                    documents=[chunk],
-                    metadatas=[{
-                        "source_file": filepath,
-                        "chunk_index": i,
-                        "total_chunks": len(chunks),
-                        "content_hash": content_hash,
-                        "indexed_at": datetime.now().isoformat()
-                    }]
-                )
-
-            stats["indexed"] += 1
-            print(f"RAG: Indexed {filepath} ({len(chunks)} chunks)")
+    embeddings = _embed_texts([p["document"] for p in pending])
+    rows = [(p, e) for p, e in zip(pending, embeddings) if e is not None]
+    failed = {p["file"] for p, e in zip(pending, embeddings) if e is None}
+    pending.clear()
 
+    written = 0
+    for start in range(0, len(rows), ADD_BATCH_SIZE):
+        batch = rows[start:start + ADD_BATCH_SIZE]
+        try:
+            # upsert: a pass interrupted before the manifest was saved may have written these ids
+            _collection.upsert(
+                ids=[p["id"] for p, _ in batch],
+                embeddings=[e for _, e in batch],
+                documents=[p["document"] for p, _ in batch],
+                metadatas=[p["metadata"] for p, _ in batch]
+            )
+            if _lexical is not None:
+                _lexical.add([p["id"] for p, _ in batch], [p["document"] for p, _ in batch])
+            written += len(batch)
         except Exception as e:
-            stats["errors"].append(f"{filepath}: {e}")
-            print(f"RAG: Error indexing {filepath}: {e}")
+            print(f"RAG: Bulk write failed ({len(batch)} chunks): {e}")
+            failed.update(p["file"] for p, _ in batch)
+    if written:
+        _bump_index_version()
+    for normalized in failed:
+        entry = manifest.get(normalized)
+        if entry:
+            entry.update(mtime=None, size=None, content_hash=None)
+    return written
+
+
+def _open_manifest():
+    """Load the manifest, resetting or seeding it to match the store."""
+    manifest = _load_manifest()
+    if _collection.count() == 0:
+        return {}  # store was wiped or replaced; the manifest is stale
+    if not manifest:
+        return _seed_manifest_from_collection()
+    return manifest
+
+
+def _remove_file(manifest, normalized, stats):
+    """Drop a file's chunks and manifest entry."""
+    stale_ids = manifest.pop(normalized).get("chunk_ids") or []
+    try:
+        _delete_chunks(stale_ids)
+    except Exception as e:
+        print(f"RAG: Could not remove chunks for {normalized}: {e}")
+    stats["removed"] += 1
+
+
+def _index_one(filepath, manifest, pending, stats, force_reindex=False):
+    """Queue a file's chunks if it changed since the manifest entry was written."""
+    normalized = os.path.normpath(filepath)
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return
+
+    entry = manifest.get(normalized)
+    if entry and entry.get("chunker", 1) != CHUNKER_VERSION:
+        force_reindex = True  # chunked by an older chunker
+    if (entry and not force_reindex
+            and entry.get("mtime") == st.st_mtime and entry.get("size") == st.st_size):
+        stats["skipped"] += 1
+        return
+
+    try:
+        # Read file content
+        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+            content = f.read()
+
+        if not content.strip():
+            return
+
+        # Check if file has changed since last index
+        content_hash = _content_hash(content)
+        file_id_base = filepath.replace('/', '_').replace('.', '_')
+
+        # Touched but unchanged: just refresh the stat info
+        if entry and not force_reindex and entry.get("content_hash") == content_hash:
+            entry["mtime"] = st.st_mtime
+            entry["size"] = st.st_size
+            stats["skipped"] += 1
+            return
+
+        # For JSON files, extract meaningful content
+        if filepath.endswith('.json'):
+            try:
+                data = json.loads(content)
+                # For iga_memory.json, extract memory entries
+                if isinstance(data, dict):
+                    lines = []
+                    for key, value in data.items():
+                        if isinstance(value, dict) and 'value' in value:
+                            lines.append(f"[{key}]: {value['value']}")
+                        else:
+                            lines.append(f"[{key}]: {json.dumps(value)}")
+                    content = "\n".join(lines)
+            except json.JSONDecodeError:
+                pass  # Use raw content
+
+        # Delete old chunks before re-indexing
+        if entry and entry.get("chunk_ids"):
+            _delete_chunks(entry["chunk_ids"])
+
+        # Chunk the content and queue it for batched embedding
+        chunks = _chunk_file(filepath, content)
+        indexed_at = datetime.now().isoformat()
+        chunk_ids = []
+        for i, chunk in enumerate(chunks):
+            doc_id = f"{file_id_base}_chunk_{i}"
+            chunk_ids.append(doc_id)
+            pending.append({
+                "id": doc_id,
+                "file": normalized,
+                "document": chunk,
+                "metadata": {
+                    "source_file": filepath,
+                    "chunk_index": i,
+                    "total_chunks": len(chunks),
+                    "content_hash": content_hash,
+                    "indexed_at": indexed_at
+                }
+            })
+
+        # Provisional until the chunks are written: _flush_pending clears the
+        # stat and hash again if any of them fails
+        manifest[normalized] = {
+            "source_file": filepath,
+            "mtime": st.st_mtime,
+            "size": st.st_size,
+            "content_hash": content_hash,
+            "chunk_ids": chunk_ids,
+            "chunker": CHUNKER_VERSION,
+        }
+        stats["indexed"] += 1
+        print(f"RAG: Queued {filepath} ({len(chunks)} chunks)")
+
+        if len(pending) >= EMBED_BATCH_SIZE:
+            stats["chunks"] += _flush_pending(pending, manifest)
+
+    except Exception as e:
+        stats["errors"].append(f"{filepath}: {e}")
+        print(f"RAG: Error indexing {filepath}: {e}")
+
+
+def _finish_indexing(manifest, pending, stats):
+    """Flush remaining chunks and persist manifest + lexical index."""
+    stats["chunks"] += _flush_pending(pending, manifest)
+    _save_manifest(manifest)
+    if _lexical is not None:
+        _lexical.save()
+
+
+def index_files(force_reindex=False):
+    """Index Iga's files into the vector store.
+
+    Files whose mtime and size match the manifest are skipped without being
+    opened; changed files have their old chunks removed by id from the manifest.
+    """
+    if not _initialized or _collection is None:
+        print("RAG: Not initialized, call init_rag() first")
+        return {"indexed": 0, "skipped": 0, "removed": 0, "chunks": 0, "errors": []}
+
+    stats = {"indexed": 0, "skipped": 0, "removed": 0, "chunks": 0, "errors": []}
+    pending = []  # chunks waiting to be embedded and written in bulk
 
-    print(f"RAG: Indexing complete - {stats['indexed']} indexed, {stats['skipped']} skipped, {len(stats['errors'])} errors")
+    with _index_lock:
+        manifest = _open_manifest()
+
+        # Build list of files to index
+        files = FILES_TO_INDEX.copy()
+        files.extend(_discover_all_files())
+
+        # Remove duplicates while preserving order
+        seen = set()
+        unique_files = []
+        for f in files:
+            normalized = os.path.normpath(f)
+            if normalized not in seen:
+                seen.add(normalized)
+                unique_files.append(f)
+
+        # Drop chunks for files that no longer exist (or are no longer indexable)
+        for normalized in [p for p in manifest if p not in seen or not os.path.exists(p)]:
+            _remove_file(manifest, normalized, stats)
+
+        for filepath in unique_files:
+            _index_one(filepath, manifest, pending, stats, force_reindex)
+
+        _finish_indexing(manifest, pending, stats)
+
+    print(f"RAG: Indexing complete - {stats['indexed']} indexed ({stats['chunks']} chunks), {stats['skipped']} skipped, {stats['removed']} removed, {len(stats['errors'])} errors")
     mark_indexed()
     return stats
 
 
-def retrieve_context(query, top_k=10):
-    """Find relevant chunks for a query."""
+def _source_path(normalized):
+    """Path as index_files reports it (FILES_TO_INDEX as written, discovered files with ./)."""
+    for f in FILES_TO_INDEX:
+        if os.path.normpath(f) == normalized:
+            return f
+    return os.path.join('.', normalized)
+
+
+def index_paths(paths):
+    """Incrementally (re)index specific files; removes ones that are gone or no longer indexable."""
+    stats = {"indexed": 0, "skipped": 0, "removed": 0, "chunks": 0, "errors": []}
     if not _initialized or _collection is None:
+        return stats
+
+    pending = []
+    with _index_lock:
+        manifest = _open_manifest()
+        for path in dict.fromkeys(os.path.normpath(p) for p in paths):
+            if _is_indexable(path):
+                _index_one(_source_path(path), manifest, pending, stats)
+            elif path in manifest:
+                _remove_file(manifest, path, stats)
+        _finish_indexing(manifest, pending, stats)
+
+    if stats["indexed"] or stats["removed"]:
+        print(f"RAG: Updated {stats['indexed']} file(s) ({stats['chunks']} chunks), removed {stats['removed']}")
+    return stats
+
+
+# ─────────────────────────────────────────────────────────────
+# BACKGROUND INDEXER
+# ─────────────────────────────────────────────────────────────
+
+def notify_file_changed(path):
+    """Tell the background indexer a file was written or deleted."""
+    if _indexer_thread is not None:
+        _indexer_queue.put(path)
+
+
+def request_full_scan():
+    """Ask the background indexer for a full (stat-based) pass. Returns False if it isn't running."""
+    if _indexer_thread is None or not _indexer_thread.is_alive():
+        return False
+    _indexer_queue.put(_FULL_SCAN)
+    return True
+
+
+def _start_inotify(paths_queue):
+    """Watch the workspace with inotify if inotify_simple is installed. Returns the watcher or None."""
+    try:
+        from inotify_simple import INotify, flags
+    except ImportError:
+        return None
+    try:
+        inotify = INotify()
+        mask = flags.CLOSE_WRITE | flags.MOVED_TO | flags.MOVED_FROM | flags.DELETE | flags.CREATE
+        watch_dirs = {}
+        for root, dirs, _ in os.walk('.'):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith('.')]
+            watch_dirs[inotify.add_watch(root, mask)] = root
+    except Exception as e:
+        print(f"RAG: inotify unavailable, polling only: {e}")
+        return None
+
+    def reader():
+        while not _indexer_stop.is_set():
+            try:
+                for event in inotify.read(timeout=1000):
+                    root = watch_dirs.get(event.wd)
+                    if root and event.name:
+                        paths_queue.put(os.path.join(root, event.name))
+            except Exception:
+                time.sleep(1)
+
+    threading.Thread(target=reader, daemon=True, name="rag-inotify").start()
+    return inotify
+
+
+def _indexer_loop(startup_jobs, poll_seconds):
+    """Run startup indexing, then re-embed changed paths as they come in."""
+    try:
+        index_files()
+        for job in startup_jobs:
+            job()
+    except Exception as e:
+        print(f"RAG: Background startup indexing failed: {e}")
+
+    watching = _start_inotify(_indexer_queue) is not None
+    if watching:
+        poll_seconds *= 10  # inotify covers most changes; keep a slow safety scan
+    next_scan = time.time() + poll_seconds
+
+    while not _indexer_stop.is_set():
+        try:
+            item = _indexer_queue.get(timeout=max(0.1, next_scan - time.time()))
+        except queue.Empty:
+            item = _FULL_SCAN
+        if _indexer_stop.is_set():
+            break
+
+        # Collect everything that arrives until writes settle (bounded so a busy writer can't starve us)
+        batch = [item]
+        settle_deadline = time.time() + 5 * INDEXER_DEBOUNCE_SECONDS
+        while time.time() < settle_deadline:
+            try:
+                batch.append(_indexer_queue.get(timeout=INDEXER_DEBOUNCE_SECONDS))
+            except queue.Empty:
+                break
+
+        try:
+            if any(p is _FULL_SCAN for p in batch):
+                _scan_changes()
+                next_scan = time.time() + poll_seconds
+            else:
+                index_paths(batch)
+        except Exception as e:
+            print(f"RAG: Background indexing error: {e}")
+
+
+def _scan_changes():
+    """Quiet full pass: stat every indexable file and re-embed only what changed."""
+    with _index_lock:
+        manifest = _load_manifest()
+        current = {os.path.normpath(f) for f in FILES_TO_INDEX if os.path.exists(f)}
+        current.update(os.path.normpath(f) for f in _discover_all_files())
+        changed = list(current - set(manifest))
+        changed.extend(set(manifest) - current)
+        for p in current & set(manifest):
+            try:
+                st = os.stat(p)
+            except OSError:
+                changed.append(p)
+                continue
+            entry = manifest[p]
+            if entry.get("mtime") != st.st_mtime or entry.get("size") != st.st_size:
+                changed.append(p)
+        if changed:
+            index_paths(changed)
+
+
+def start_background_indexer(startup_jobs=(), poll_seconds=INDEXER_POLL_SECONDS):
+    """Start the background indexer thread (idempotent).
+
+    It runs index_files() and any startup_jobs off the main thread, then
+    watches the workspace (inotify when available, mtime polling otherwise)
+    and re-embeds changed files incrementally.
+    """
+    global _indexer_thread
+    if not _initialized:
+        return False
+    if _indexer_thread is not None and _indexer_thread.is_alive():
+        return True
+    _indexer_stop.clear()
+    _indexer_thread = threading.Thread(
+        target=_indexer_loop, args=(list(startup_jobs), poll_seconds), daemon=True, name="rag-indexer"
+    )
+    _indexer_thread.start()
+    print("RAG: Background indexer started")
+    return True
+
+
+def stop_background_indexer(timeout=5):
+    """Stop the background indexer, letting an in-progress pass finish."""
+    global _indexer_thread
+    if _indexer_thread is None:
+        return
+    _indexer_stop.set()
+    _indexer_queue.put(_FULL_SCAN)  # wake it
+    _indexer_thread.join(timeout)
+    _indexer_thread = None
+
+
+def _vector_candidates(query, top_k):
+    """Vector hits as [(doc_id, document, metadata, relevance)], boosted and thresholded."""
+    query_embedding = _embed_text(query)
+    if query_embedding is None:
         return []
 
-    if _collection.count() == 0:
+    results = _collection.query(
+        query_embeddings=[query_embedding],
+        n_results=min(top_k, _collection.count()),
+        include=["documents", "metadatas", "distances"]
+    )
+    if not results or not results['documents'] or not results['documents'][0]:
         return []
 
-    try:
-        # Generate query embedding
-        query_embedding = _embed_text(query)
-        if query_embedding is None:
-            return []
-
-        # Query the collection
-        results = _collection.query(
-            query_embeddings=[query_embedding],
-            n_results=min(top_k, _collection.count()),
-            include=["documents", "metadatas", "distances"]
-        )
+    # Extract query terms for filename matching
+    query_terms = set(query.lower().split())
 
-        # Format results
-        context_items = []
-        seen_sources = set()  # For deduplication (using normalized paths)
+    candidates = []
+    for i, doc in enumerate(results['documents'][0]):
+        metadata = results['metadatas'][0][i] if results['metadatas'] else {}
+        distance = results['distances'][0][i] if results['distances'] else 0
+        relevance = 1 - distance
+        normalized_source = os.path.normpath(metadata.get("source_file", "unknown"))
+
+        # Boost relevance for core/ files (foundational knowledge)
+        if normalized_source.startswith("core/") or "/core/" in normalized_source:
+            relevance += 0.2
+
+        # Boost relevance if query terms appear in filename
+        filename = os.path.basename(normalized_source).lower()
+        filename_no_ext = os.path.splitext(filename)[0].replace('_', ' ').replace('-', ' ')
+        if any(term in filename_no_ext for term in query_terms if len(term) > 2):
+            relevance += 0.1
 
-        # Extract query terms for filename matching
-        query_terms = set(query.lower().split())
+        # Skip low relevance results (after boosts applied)
+        if relevance < 0.25:
+            continue
+        candidates.append((results['ids'][0][i], doc, metadata, relevance))
+
+    # Re-sort by relevance since boosts may have changed ordering
+    candidates.sort(key=lambda x: x[3], reverse=True)
+    return candidates
 
-        if results and results['documents'] and results['documents'][0]:
-            for i, doc in enumerate(results['documents'][0]):
-                metadata = results['metadatas'][0][i] if results['metadatas'] else {}
-                distance = results['distances'][0][i] if results['distances'] else 0
-                relevance = 1 - distance
-                source = metadata.get("source_file", "unknown")
 
-                # Normalize path to prevent duplicates (./file.md vs file.md)
-                normalized_source = os.path.normpath(source)
+def retrieve_context(query, top_k=10):
+    """Find relevant chunks for a query.
+
+    Vector and BM25 rankings are merged with reciprocal rank fusion, so exact
+    names (function, tool and file names) surface even when embeddings miss
+    them. relevance is the fused score scaled so 1.0 means ranked first by both.
+    """
+    if not _initialized or _collection is None:
+        return []
+
+    if _collection.count() == 0:
+        return []
 
-                # Boost relevance for core/ files (foundational knowledge)
-                if normalized_source.startswith("core/") or "/core/" in normalized_source:
-                    relevance += 0.2
+    try:
+        fused = {}  # doc_id -> rrf score
+        docs = {}  # doc_id -> (document, metadata)
 
-                # Boost relevance if query terms appear in filename
-                filename = os.path.basename(normalized_source).lower()
-                filename_no_ext = os.path.splitext(filename)[0].replace('_', ' ').replace('-', ' ')
-                if any(term in filename_no_ext for term in query_terms if len(term) > 2):
-                    relevance += 0.1
+        try:
+            for rank, (doc_id, doc, metadata, _) in enumerate(_vector_candidates(query, top_k)):
+                fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+                docs[doc_id] = (doc, metadata)
+        except Exception as e:
+            print(f"RAG vector search error: {e}")
 
-                # Skip low relevance results (after boosts applied)
-                if relevance < 0.25:
-                    continue
+        lexical_hits = _lexical.search(query, top_k) if _lexical is not None else []
+        for rank, (doc_id, _) in enumerate(lexical_hits):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (RRF_K + rank + 1)
 
-                # Skip duplicate sources using normalized paths
-                if normalized_source in seen_sources:
-                    continue
-                seen_sources.add(normalized_source)
+        # Lexical-only hits need their text from the store
+        missing = [doc_id for doc_id in fused if doc_id not in docs]
+        if missing:
+            fetched = _collection.get(ids=missing, include=["documents", "metadatas"])
+            for doc_id, doc, metadata in zip(fetched['ids'], fetched['documents'], fetched['metadatas']):
+                docs[doc_id] = (doc, metadata or {})
 
-                context_items.append({
-                    "content": doc,
-                    "source": normalized_source,
-                    "relevance": relevance,
-                })
+        # Format results
+        context_items = []
+        seen_sources = set()  # For deduplication (using normalized paths)
+        best_possible = 2.0 / (RRF_K + 1)
+        for doc_id, score in sorted(fused.items(), key=lambda x: x[1], reverse=True):
+            if doc_id not in docs:
+                continue  # stale lexical entry
+            doc, metadata = docs[doc_id]
+
+            # Normalize path to prevent duplicates (./file.md vs file.md)
+            normalized_source = os.path.normpath(metadata.get("source_file", "unknown"))
+            if normalized_source in seen_sources:
+                continue
+            seen_sources.add(normalized_source)
 
-        # Re-sort by relevance since boosts may have changed ordering
-        context_items.sort(key=lambda x: x['relevance'], reverse=True)
+            context_items.append({
+                "content": doc,
+                "source": normalized_source,
+                "relevance": score / best_possible,
+            })
+            if len(context_items) >= top_k:
+                break
 
         return context_items
 
@@ -419,14 +1078,30 @@ def format_context_for_prompt(context_items):
     return "\n".join(lines)
 
 
+def _embed_cache_size():
+    """Number of embeddings stored in the on-disk cache."""
+    try:
+        with _embed_cache_lock:
+            return _get_embed_cache().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+    except Exception:
+        return 0
+
+
 def get_rag_status():
     """Get current RAG system status."""
     return {
         "initialized": _initialized,
+        "backend": _backend,
         "chromadb_available": CHROMADB_AVAILABLE,
+        "numpy_available": NUMPY_AVAILABLE,
         "openai_available": OPENAI_AVAILABLE,
+        "embedding_provider": _provider.name if _provider else None,
+        "collection": _collection_name,
         "document_count": _collection.count() if _collection else 0,
-        "persist_dir": CHROMA_PERSIST_DIR,
+        "lexical_count": len(_lexical) if _lexical is not None else 0,
+        "embedding_cache_entries": _embed_cache_size(),
+        "background_indexer": _indexer_thread is not None and _indexer_thread.is_alive(),
+        "persist_dir": NUMPY_STORE_DIR if _backend == "numpy" else CHROMA_PERSIST_DIR,
     }
 
 
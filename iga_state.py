@@ -0,0 +1,127 @@
+# Process-wide store for iga_state.json
+# Held in memory, written through atomically, reloaded only when another process changes the file
+
+import os
+import json
+import threading
+
+STATE_FILE = "iga_state.json"
+DEFAULT_STATE = {"mode": "listening", "current_task": None, "tick_interval": 60,
+                 "sleep_until": None, "sleep_cycle_minutes": 30}
+
+
+class StateStore:
+    """Authoritative in-memory copy of a JSON state file.
+
+    get() costs a stat() - the file is parsed again only when its mtime/size
+    changed, i.e. someone else wrote it. Writes go to a temp file and are
+    renamed into place, so readers in other processes never see half a file.
+    Subscribers are called with (new_state, changed_keys) after every change,
+    local or external.
+    """
+
+    def __init__(self, path=STATE_FILE, defaults=None):
+        self.path = path
+        self.defaults = dict(DEFAULT_STATE if defaults is None else defaults)
+        self._lock = threading.RLock()
+        self._state = None
+        self._stamp = None
+        self._subscribers = []
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def _refresh(self):
+        """Reload if the file changed on disk. Caller holds the lock. Returns the previous state."""
+        stamp = self._file_stamp()
+        if self._state is not None and stamp == self._stamp:
+            return self._state
+        previous = self._state
+        state = dict(self.defaults)
+        if stamp is not None:
+            try:
+                with open(self.path, 'r') as f:
+                    content = f.read().strip()
+                state.update(json.loads(content) if content else {})
+            except Exception as e:
+                print(f"Warning: Could not load state: {e}")
+                state = dict(previous) if previous is not None else state
+        self._state = state
+        self._stamp = stamp
+        return previous
+
+    def _changed_keys(self, previous):
+        if previous is None:
+            return set()
+        keys = set(previous) | set(self._state)
+        return {k for k in keys if previous.get(k) != self._state.get(k)}
+
+    def _notify(self, state, changed):
+        if not changed:
+            return
+        for callback in list(self._subscribers):
+            try:
+                callback(state, changed)
+            except Exception as e:
+                print(f"Warning: State subscriber failed: {e}")
+
+    def get(self):
+        """Current state (a copy - mutate it and pass it to set())."""
+        with self._lock:
+            previous = self._refresh()
+            changed = self._changed_keys(previous)
+            state = dict(self._state)
+        self._notify(state, changed)
+        return dict(state)
+
+    def _commit(self, make_state):
+        """Write make_state(current) through and notify. Returns the new state."""
+        with self._lock:
+            previous = self._state
+            self._refresh()
+            self._state = dict(make_state(self._state))
+            self._write()
+            state = dict(self._state)
+            changed = self._changed_keys(previous)
+        self._notify(state, changed)
+        return state
+
+    def set(self, state):
+        """Replace the whole state and write it through."""
+        self._commit(lambda current: state)
+
+    def update(self, **changes):
+        """Atomically change some keys, keeping whatever else is on disk."""
+        return self._commit(lambda current: {**current, **changes})
+
+    def subscribe(self, callback):
+        """Call callback(state, changed_keys) whenever the state changes."""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _write(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._state, f, indent=2)
+        os.replace(tmp_path, self.path)
+        self._stamp = self._file_stamp()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path=STATE_FILE):
+    """The shared store for a state file (one per absolute path per process)."""
+    key = os.path.abspath(str(path))
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = StateStore(str(path))
+        return _stores[key]
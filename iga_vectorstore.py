@@ -0,0 +1,296 @@
+# Vector store backends for Iga's RAG
+# ChromaDB when installed, or a pure NumPy store (memory-mapped float32 matrix + JSONL metadata log)
+
+import os
+import re
+import json
+import threading
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    import chromadb
+    CHROMADB_AVAILABLE = True
+except ImportError:
+    CHROMADB_AVAILABLE = False
+
+BACKENDS = ("chroma", "numpy")
+NUMPY_STORE_DIR = ".iga_vectors"
+
+
+def _matches(metadata, where):
+    """Equality-only metadata filter ({"key": value, ...})."""
+    if not where:
+        return True
+    return all(metadata.get(k) == v for k, v in where.items())
+
+
+class NumpyStore:
+    """Exact cosine search over a memory-mapped float32 matrix.
+
+    Stands in for a Chroma collection: it implements the subset iga_rag
+    uses (count, add, upsert, delete, get and query) with the same
+    arguments, and get()/query() return Chroma-shaped result dicts, so
+    callers don't care which backend is behind open_store().
+
+    Rows are stored L2-normalized, so top-k is one matrix-vector product.
+    Row metadata lives in an append-only JSONL log next to the matrix: each
+    write appends an "add" or "del" record instead of rewriting everything.
+    Deleted rows are tombstoned and compacted away once they outnumber the
+    live ones. Compaction writes a new matrix file and then a snapshot log
+    naming it; swapping the log in is the commit point, so a crash leaves
+    either the old pair or the new one. Brute force beats HNSW at our scale
+    (tens of thousands of chunks) and the store opens in milliseconds.
+    """
+
+    SNAPSHOT_CHUNK = 1000  # rows per "add" record in a snapshot
+
+    def __init__(self, persist_dir=NUMPY_STORE_DIR, name="iga_knowledge"):
+        if not NUMPY_AVAILABLE:
+            raise ImportError("numpy is required for the NumPy vector store")
+        os.makedirs(persist_dir, exist_ok=True)
+        self.persist_dir = persist_dir
+        self.name = name
+        self.matrix_path = os.path.join(persist_dir, f"{name}.f32")
+        self.meta_path = os.path.join(persist_dir, f"{name}.jsonl")
+        self.legacy_meta_path = os.path.join(persist_dir, f"{name}.json")  # whole-file sidecar, migrated on load
+        self._lock = threading.RLock()
+        self._dim = None
+        self._generation = 0  # bumped by each compaction; names the matrix file
+        self._rows = []  # row -> {"id", "document", "metadata"} or None (deleted)
+        self._row_of = {}  # id -> row
+        self._matrix = None
+        self._load()
+
+    # ── persistence ──────────────────────────────────────────
+
+    def _header(self):
+        return {"op": "header", "dim": self._dim, "generation": self._generation,
+                "matrix": os.path.basename(self.matrix_path)}
+
+    def _replay(self):
+        with open(self.meta_path, 'rb') as f:
+            data = f.read()
+        if data and not data.endswith(b"\n"):
+            # Crash mid-append: drop the partial record
+            data = data[:data.rfind(b"\n") + 1]
+            with open(self.meta_path, 'r+b') as f:
+                f.truncate(len(data))
+        for line in data.splitlines():
+            record = json.loads(line)
+            op = record.get("op")
+            if op == "header":
+                self._dim = record.get("dim")
+                self._generation = record.get("generation", 0)
+                self.matrix_path = os.path.join(self.persist_dir, record["matrix"])
+            elif op == "add":
+                self._rows.extend(record["rows"])
+            elif op == "del":
+                for row in record["rows"]:
+                    self._rows[row] = None
+
+    def _load(self):
+        if os.path.exists(self.meta_path):
+            self._replay()
+        elif os.path.exists(self.legacy_meta_path):
+            with open(self.legacy_meta_path, 'r') as f:
+                meta = json.load(f)
+            self._dim = meta.get("dim")
+            self._rows = meta.get("rows", [])
+            self._write_snapshot()
+            os.remove(self.legacy_meta_path)
+        self._row_of = {r["id"]: i for i, r in enumerate(self._rows) if r}
+        # Matrix files from an interrupted compaction (or the one it replaced)
+        current = os.path.basename(self.matrix_path)
+        pattern = re.compile(rf"^{re.escape(self.name)}(\.\d+)?\.f32$")
+        for filename in os.listdir(self.persist_dir):
+            if pattern.match(filename) and filename != current:
+                os.remove(os.path.join(self.persist_dir, filename))
+        if self._dim:
+            # Drop any rows appended after the last log write (crash mid-add)
+            expected = len(self._rows) * self._dim * 4
+            if os.path.exists(self.matrix_path) and os.path.getsize(self.matrix_path) > expected:
+                with open(self.matrix_path, 'r+b') as f:
+                    f.truncate(expected)
+        self._remap()
+
+    def _remap(self):
+        if self._dim and self._rows and os.path.exists(self.matrix_path):
+            self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode='r',
+                                     shape=(len(self._rows), self._dim))
+        else:
+            self._matrix = None
+
+    def _log(self, records):
+        with open(self.meta_path, 'a') as f:
+            f.write("".join(json.dumps(r) + "\n" for r in records))
+
+    def _write_snapshot(self):
+        """Atomically replace the log with a header plus the current rows."""
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(json.dumps(self._header()) + "\n")
+            for start in range(0, len(self._rows), self.SNAPSHOT_CHUNK):
+                f.write(json.dumps({"op": "add", "rows": self._rows[start:start + self.SNAPSHOT_CHUNK]}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.meta_path)
+
+    def _compact(self):
+        live = [i for i, r in enumerate(self._rows) if r]
+        old_matrix = self.matrix_path
+        self._generation += 1
+        self.matrix_path = os.path.join(self.persist_dir, f"{self.name}.{self._generation}.f32")
+        with open(self.matrix_path, 'wb') as f:
+            if live:
+                np.asarray(self._matrix[live], dtype=np.float32).tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        self._rows = [self._rows[i] for i in live]
+        self._row_of = {r["id"]: i for i, r in enumerate(self._rows)}
+        self._write_snapshot()  # commit point: the log now names the new matrix
+        self._matrix = None
+        if os.path.exists(old_matrix):
+            os.remove(old_matrix)
+        self._remap()
+
+    def _maybe_compact(self):
+        dead = len(self._rows) - len(self._row_of)
+        if dead > max(1000, len(self._row_of)):
+            self._compact()
+
+    # ── writes ───────────────────────────────────────────────
+
+    def _append(self, ids, embeddings, documents, metadatas, records=()):
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(ids):
+            raise ValueError("embeddings must be a list of equal-length vectors, one per id")
+        records = list(records)
+        if self._dim is None:
+            self._dim = int(vectors.shape[1])
+            records.insert(0, self._header())
+        elif vectors.shape[1] != self._dim:
+            raise ValueError(f"embedding dimension {vectors.shape[1]} != store dimension {self._dim}")
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors /= norms
+
+        self._matrix = None  # release the map before growing the file
+        with open(self.matrix_path, 'ab') as f:
+            f.write(vectors.tobytes())
+        rows = [{"id": doc_id, "document": doc, "metadata": meta or {}}
+                for doc_id, doc, meta in zip(ids, documents, metadatas)]
+        for row in rows:
+            self._row_of[row["id"]] = len(self._rows)
+            self._rows.append(row)
+        self._log(records + [{"op": "add", "rows": rows}])
+        self._remap()
+
+    def add(self, ids, embeddings, documents, metadatas):
+        with self._lock:
+            duplicates = [i for i in ids if i in self._row_of]
+            if duplicates:
+                raise ValueError(f"ids already exist: {duplicates[:5]}")
+            self._append(ids, embeddings, documents, metadatas)
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        with self._lock:
+            dead = self._tombstone(ids)
+            self._append(ids, embeddings, documents, metadatas,
+                         records=[{"op": "del", "rows": dead}] if dead else ())
+            self._maybe_compact()
+
+    def _tombstone(self, ids):
+        """Mark the rows of ids deleted in memory. Returns their row numbers."""
+        removed = []
+        for doc_id in ids:
+            row = self._row_of.pop(doc_id, None)
+            if row is not None:
+                self._rows[row] = None
+                removed.append(row)
+        return removed
+
+    def delete(self, ids):
+        with self._lock:
+            dead = self._tombstone(ids)
+            if not dead:
+                return
+            self._log([{"op": "del", "rows": dead}])
+            self._maybe_compact()
+
+    # ── reads ────────────────────────────────────────────────
+
+    def count(self):
+        return len(self._row_of)
+
+    def get(self, ids=None, where=None, include=None):
+        include = include or ["metadatas", "documents"]
+        with self._lock:
+            if ids is not None:
+                rows = [self._rows[self._row_of[i]] for i in ids if i in self._row_of]
+            else:
+                rows = [r for r in self._rows if r]
+            rows = [r for r in rows if _matches(r["metadata"], where)]
+        result = {"ids": [r["id"] for r in rows]}
+        if "metadatas" in include:
+            result["metadatas"] = [r["metadata"] for r in rows]
+        if "documents" in include:
+            result["documents"] = [r["document"] for r in rows]
+        return result
+
+    def query(self, query_embeddings, n_results=10, include=None):
+        include = include or ["metadatas", "documents", "distances"]
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        with self._lock:
+            matrix, rows = self._matrix, self._rows
+            for embedding in query_embeddings:
+                ids, docs, metas, dists = [], [], [], []
+                if matrix is not None and self._row_of:
+                    q = np.asarray(embedding, dtype=np.float32)
+                    q /= (np.linalg.norm(q) or 1.0)
+                    scores = matrix @ q
+                    dead = [i for i, r in enumerate(rows) if r is None]
+                    if dead:
+                        scores[dead] = -np.inf
+                    k = min(n_results, len(self._row_of))
+                    top = np.argpartition(-scores, k - 1)[:k]
+                    for row in top[np.argsort(-scores[top])]:
+                        r = rows[row]
+                        ids.append(r["id"])
+                        docs.append(r["document"])
+                        metas.append(r["metadata"])
+                        dists.append(float(1.0 - scores[row]))  # cosine distance, like Chroma
+                result["ids"].append(ids)
+                result["documents"].append(docs)
+                result["metadatas"].append(metas)
+                result["distances"].append(dists)
+        return {k: v for k, v in result.items() if k == "ids" or k in include}
+
+
+def default_backend():
+    """Backend from IGA_VECTOR_STORE, falling back to whatever is installed."""
+    backend = os.getenv("IGA_VECTOR_STORE", "").strip().lower()
+    if backend in BACKENDS:
+        return backend
+    if CHROMADB_AVAILABLE:
+        return "chroma"
+    if NUMPY_AVAILABLE:
+        return "numpy"
+    return None
+
+
+def open_store(backend, name, chroma_dir, numpy_dir=NUMPY_STORE_DIR):
+    """Open (or create) a collection on the given backend."""
+    if backend == "chroma":
+        if not CHROMADB_AVAILABLE:
+            raise ImportError("chromadb is not installed")
+        os.makedirs(chroma_dir, exist_ok=True)
+        client = chromadb.PersistentClient(path=chroma_dir)
+        return client.get_or_create_collection(name=name, metadata={"hnsw:space": "cosine"})
+    if backend == "numpy":
+        return NumpyStore(numpy_dir, name)
+    raise ValueError(f"Unknown vector store backend: {backend}")
@@ -1,6 +1,6 @@
 import subprocess
 import pexpect
-import sys, click, os, json, re, urllib.request, urllib.error, time, threading, queue, select
+import sys, click, os, json, urllib.request, urllib.error, time, threading, queue, select
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
@@ -9,10 +9,17 @@ load_dotenv()
 
 # OpenRouter client for API calls with cost tracking
 import openrouter_client
+import iga_log
+import iga_http
+from iga_embeddings import OPENAI_BASE_URL
+from iga_state import get_store as get_state_store
+from iga_memory import get_memory_store
+from iga_context import text_tokens, message_tokens, conversation_tokens, fit_to_budget, forget_message
 
 # RAG module import
 try:
-    from iga_rag import init_rag, index_files, retrieve_context, format_context_for_prompt, get_rag_status, needs_reindex
+    from iga_rag import (init_rag, index_files, retrieve_context, format_context_for_prompt, get_rag_status, needs_reindex,
+                         get_index_version, notify_file_changed, request_full_scan, start_background_indexer, stop_background_indexer)
     RAG_AVAILABLE = True
 except ImportError as e:
     RAG_AVAILABLE = False
@@ -20,7 +27,7 @@ except ImportError as e:
 
 # Message archive import
 try:
-    from tools.message_archive import archive_messages, get_archive_stats
+    from tools.message_archive import archive_messages, get_archive_stats, get_high_water, mark_archived
     ARCHIVE_AVAILABLE = True
 except ImportError as e:
     ARCHIVE_AVAILABLE = False
@@ -38,15 +45,26 @@ except ImportError as e:
 MAIN_MODEL = "anthropic/claude-opus-4.6"
 SUMMARIZE_MODEL = "anthropic/claude-sonnet-4"
 MEMORY_FILE = "iga_memory.json"
-CONVERSATION_FILE = "iga_conversation.json"
+CONVERSATION_FILE = "iga_conversation.json"  # pre-log format, migrated on load
+CONVERSATION_LOG_FILE = "iga_conversation.jsonl"  # append-only conversation log
+CONVERSATION_LOG_COMPACT_RECORDS = 500  # compact once this many records piled up
 JOURNAL_FILE = "iga_journal.txt"
 STATE_FILE = "iga_state.json"
 BACKUP_DIR = ".iga_backups"
 LAST_KNOWN_GOOD_FILE = ".iga_backups/last_known_good.py"
 HEARTBEAT_FILE = Path(".heartbeat")
+HEARTBEAT_INTERVAL = 10  # seconds between heartbeats while idle (runner's stall timeout is 180)
 MAX_CONVERSATION_HISTORY = 150
 SUMMARIZE_THRESHOLD = 200  # Trigger summarization when we hit this many messages
 SUMMARIZE_BATCH = 50       # How many old messages to compress into summary
+SUMMARIZE_PREFETCH = 20    # Start summarizing in the background this many messages early
+CONTEXT_TOKEN_BUDGET = 100000      # Max estimated prompt tokens (system + RAG + conversation + reply)
+RESPONSE_MAX_TOKENS = 2048         # Reserved for the reply
+STREAM_RESPONSES = True  # Stream replies and run each action as soon as its block is complete
+PROMPT_CACHE = True  # Stable system prefix + conversation cached by the provider; RAG context rides in a trailing message
+SUMMARIZE_TOKEN_THRESHOLD = 60000  # Also summarize once the conversation alone estimates this big
+SUMMARIZE_PREFETCH_TOKENS = 8000   # ...starting in the background this many tokens early
+SUMMARIZE_BATCH_TOKENS = 20000     # A batch stops at SUMMARIZE_BATCH messages or this many tokens
 VERSION = "2.5.0"  # Robustness update
 
 # Available actions
@@ -160,29 +178,13 @@ class ErrorThrottler:
 
 _error_throttler = ErrorThrottler()
 def safe_print(msg):
-    with _print_lock:
-        # Log to file for debugging
-        try:
-            log_path = Path("data/console_log.txt")
-            log_path.parent.mkdir(exist_ok=True)
-            with open(log_path, "a") as log_file:
-                # Strip ANSI codes for log file
-                clean_msg = re.sub(r'\033\[[0-9;]*m', '', str(msg))
-                log_file.write(f"{datetime.now().isoformat()} | {clean_msg}\n")
-            # Keep log file from growing forever (max 1000 lines)
-            if log_path.stat().st_size > 100000:  # ~100KB
-                lines = log_path.read_text().splitlines()[-500:]
-                log_path.write_text("\n".join(lines) + "\n")
-        except Exception:
-            pass  # Don't let logging break the app
+    msg = str(msg)
+    # Log to file for debugging (queued - the background writer does the disk I/O)
+    iga_log.log(msg)
 
-        # Use prompt_toolkit for proper ANSI handling in Cursor terminal
-        try:
-            from prompt_toolkit import print_formatted_text
-            from prompt_toolkit.formatted_text import ANSI
-            print_formatted_text(ANSI(str(msg)))
-        except Exception:
-            print(msg, flush=True)
+    # Use prompt_toolkit for proper ANSI handling in Cursor terminal
+    with _print_lock:
+        iga_log.get_renderer()(msg)
 
 def throttled_error(msg):
     """Log an error, but suppress if it's repeating rapidly."""
@@ -332,18 +334,11 @@ def safe_self_edit(file_path, new_content):
     return True, None
 
 def load_state():
-    default = {"mode": "listening", "current_task": None, "tick_interval": 60, "sleep_until": None, "sleep_cycle_minutes": 30}
-    if os.path.exists(STATE_FILE):
-        try:
-            with open(STATE_FILE, 'r') as f:
-                return {**default, **json.load(f)}
-        except Exception as e:
-            safe_print(f"{C.DIM}Warning: Could not load state: {e}{C.RESET}")
-    return default
+    """Current state from the in-memory store (re-read only if the file changed on disk)."""
+    return get_state_store(STATE_FILE).get()
 
 def save_state(state):
-    with open(STATE_FILE, 'w') as f:
-        json.dump(state, f, indent=2)
+    get_state_store(STATE_FILE).set(state)
 
 def update_heartbeat():
     """Update heartbeat file to signal the runner that we're alive."""
@@ -367,39 +362,28 @@ def parse_sleep_until(value):
 
 def get_memory_stats():
     mem_count, upgrade_count = 0, 0
-    if os.path.exists(MEMORY_FILE):
-        try:
-            with open(MEMORY_FILE, 'r') as f:
-                mem = json.load(f)
-            mem_count = len(mem)
-            upgrade_count = sum(1 for k in mem if 'upgrade' in k.lower())
-        except Exception:
-            pass  # Ignore memory stats errors
+    try:
+        keys = get_memory_store().keys()
+        mem_count = len(keys)
+        upgrade_count = sum(1 for k in keys if 'upgrade' in k.lower())
+    except Exception:
+        pass  # Ignore memory stats errors
     return mem_count, upgrade_count
 
 def get_user_name():
-    if os.path.exists(MEMORY_FILE):
-        try:
-            with open(MEMORY_FILE, 'r') as f:
-                for v in json.load(f).values():
-                    if 'Dennis' in str(v.get('value', '')):
-                        return 'Dennis'
-        except Exception:
-            pass  # Ignore errors reading user name
+    try:
+        for v in get_memory_store().all().values():
+            if isinstance(v, dict) and 'Dennis' in str(v.get('value', '')):
+                return 'Dennis'
+    except Exception:
+        pass  # Ignore errors reading user name
     return None
 
 def check_startup_intent():
-    if not os.path.exists(MEMORY_FILE):
-        return None
     try:
-        with open(MEMORY_FILE, 'r') as f:
-            mem = json.load(f)
-        if 'startup_intent' in mem:
-            intent = mem['startup_intent']['value']
-            del mem['startup_intent']
-            with open(MEMORY_FILE, 'w') as f:
-                json.dump(mem, f, indent=2)
-            return intent
+        entry = get_memory_store().pop('startup_intent')
+        if entry is not None:
+            return entry['value']
     except Exception:
         pass  # Ignore startup intent errors
     return None
@@ -441,44 +425,93 @@ Provide a concise summary (2-3 paragraphs max):"""
     except Exception as e:
         return f"[Previous {len(messages_to_summarize)} messages - summarization failed: {e}]"
 
-def maybe_summarize_conversation(messages):
-    """Summarize old messages when approaching the limit. Modifies list in place and returns it."""
-    non_system = [m for m in messages if m["role"] != "system"]
-    if len(non_system) <= SUMMARIZE_THRESHOLD:
-        return messages
+# Background summarization: the oldest batch is summarized on a worker thread
+# before the threshold is reached, and the finished summary is swapped in by
+# the next save. The foreground never waits on the summarize model.
+_summary_lock = threading.Lock()
+_summary_job = None  # {"first": id, "through": id, "count": n, "batch": [...], "summary": text or None}
 
-    # Find system message (should be first)
-    system_msg = messages[0] if messages and messages[0]["role"] == "system" else None
+def _run_summary_job(job, batch):
+    summary = summarize_messages(batch)
+    with _summary_lock:
+        job["summary"] = summary
 
-    # Get non-system messages
-    other_messages = [m for m in messages if m["role"] != "system"]
-
-    # Split into messages to summarize and messages to keep
-    to_summarize = other_messages[:SUMMARIZE_BATCH]
-    to_keep = other_messages[SUMMARIZE_BATCH:]
+def _extract_summarized(batch):
+    """AUTO-EXTRACT insights from messages a summary just replaced."""
+    try:
+        extracts = extract_from_messages(batch)
+        if extracts:
+            safe_print(f"{C.DIM}🧠 Extracted {len(extracts)} memories from summarized messages{C.RESET}")
+    except Exception as e:
+        safe_print(f"{C.DIM}(auto-extract error: {e}){C.RESET}")
+
+def _start_summary_job(batch):
+    """Summarize batch on a worker thread. Caller holds _summary_lock."""
+    global _summary_job
+    snapshot = [dict(m) for m in batch]
+    _summary_job = {"first": batch[0].get("id"), "through": batch[-1].get("id"),
+                    "count": len(batch), "batch": snapshot, "summary": None}
+    threading.Thread(target=_run_summary_job, args=(_summary_job, snapshot),
+                     name="conversation-summarizer", daemon=True).start()
+
+def _summary_batch(other_messages):
+    """Oldest messages to compress: SUMMARIZE_BATCH of them or SUMMARIZE_BATCH_TOKENS worth."""
+    tokens = 0
+    for count, msg in enumerate(other_messages[:min(SUMMARIZE_BATCH, len(other_messages) - 1)], 1):
+        tokens += message_tokens(msg)
+        if tokens >= SUMMARIZE_BATCH_TOKENS:
+            break
+    return other_messages[:count]
 
-    # ARCHIVE messages before summarizing (permanent storage)
-    if ARCHIVE_AVAILABLE:
-        archive_messages(to_summarize)
-        safe_print(f"{C.DIM}📦 Archived {len(to_summarize)} messages before summarizing{C.RESET}")
+def maybe_summarize_conversation(messages):
+    """Swap in a finished background summary of the oldest messages once over the limit.
+
+    The limit is SUMMARIZE_THRESHOLD messages or SUMMARIZE_TOKEN_THRESHOLD
+    estimated tokens. The background summary starts SUMMARIZE_PREFETCH
+    messages / SUMMARIZE_PREFETCH_TOKENS tokens before that (or right away,
+    if it's already over). Modifies list in place and returns it.
+    """
+    global _summary_job
+    other_messages = [m for m in messages if m["role"] != "system"]
+    tokens = conversation_tokens(other_messages)
+    if (len(other_messages) <= SUMMARIZE_THRESHOLD - SUMMARIZE_PREFETCH
+            and tokens <= SUMMARIZE_TOKEN_THRESHOLD - SUMMARIZE_PREFETCH_TOKENS) or len(other_messages) < 2:
+        return messages
+    over_limit = len(other_messages) > SUMMARIZE_THRESHOLD or tokens > SUMMARIZE_TOKEN_THRESHOLD
+
+    with _summary_lock:
+        job = _summary_job
+        if job is not None and (job["count"] >= len(other_messages)
+                                or job["first"] != other_messages[0].get("id")
+                                or job["through"] != other_messages[job["count"] - 1].get("id")):
+            job = _summary_job = None  # Conversation moved on under it (truncated/reloaded)
+        if job is None:
+            to_summarize = _summary_batch(other_messages)
+            if to_summarize[-1].get("id") is not None:
+                _start_summary_job(to_summarize)
+            return messages
+        if job["summary"] is None or not over_limit:
+            return messages  # Not ready, or not needed yet
+        _summary_job = None
 
-    # AUTO-EXTRACT insights before messages are compressed
+    # Extract only from summaries that are committed: a discarded job's batch
+    # gets summarized (and would be extracted) again
     if AUTO_EXTRACT_AVAILABLE:
-        try:
-            extracts = extract_from_messages(to_summarize)
-            if extracts:
-                safe_print(f"{C.DIM}🧠 Extracted {len(extracts)} memories before summarizing{C.RESET}")
-        except Exception as e:
-            safe_print(f"{C.DIM}(auto-extract error: {e}){C.RESET}")
+        threading.Thread(target=_extract_summarized, args=(job["batch"],),
+                         name="summary-extractor", daemon=True).start()
 
-    # Generate summary
-    summary = summarize_messages(to_summarize)
+    # Find system message (should be first)
+    system_msg = messages[0] if messages and messages[0]["role"] == "system" else None
+    to_keep = other_messages[job["count"]:]
 
-    # Create summary message
+    # Create summary message. It stands in for already-archived messages, so it
+    # takes the last one's id and stays under the archive's high-water mark.
     summary_msg = {
         "role": "user",
-        "content": f"[CONVERSATION SUMMARY - {len(to_summarize)} previous messages compressed]:\n{summary}"
+        "content": f"[CONVERSATION SUMMARY - {job['count']} previous messages compressed]:\n{job['summary']}",
+        "id": job["through"]
     }
+    forget_message(job["through"])  # the cached estimate is the summarized message's
 
     # Reconstruct messages list in place
     messages.clear()
@@ -487,43 +520,196 @@ def maybe_summarize_conversation(messages):
     messages.append(summary_msg)
     messages.extend(to_keep)
 
-    safe_print(f"{C.DIM}📝 Summarized {len(to_summarize)} old messages{C.RESET}")
+    safe_print(f"{C.DIM}📝 Summarized {job['count']} old messages{C.RESET}")
 
     return messages
 
+_next_message_id = None
+# run_self clones (--pipe) share our files: they must not take ids from the
+# archive's high-water mark (ours would then be dropped as duplicates) or append
+# their throwaway conversation to our log
+_pipe_mode = False
+
+def _assign_message_ids(messages):
+    """Number new conversation messages. Only the id-less tail is walked."""
+    global _next_message_id
+    if _next_message_id is None:
+        _next_message_id = (get_high_water() if ARCHIVE_AVAILABLE else 0) + 1
+    pending = []
+    for msg in reversed(messages):
+        if msg.get("id") is not None:
+            break
+        if msg.get("role") != "system":
+            pending.append(msg)
+    for msg in reversed(pending):
+        msg["id"] = _next_message_id
+        _next_message_id += 1
+
+def _messages_after(messages, high_water):
+    """Messages with ids above high_water (newest are at the end, so only the tail is walked)."""
+    pending = []
+    for msg in reversed(messages):
+        if msg.get("id") is not None and msg["id"] <= high_water:
+            break
+        if msg.get("role") != "system":
+            pending.append(msg)
+    return pending[::-1]
+
+def _first_conversation_message(messages):
+    for msg in messages[:2]:
+        if msg.get("role") != "system":
+            return msg
+    return None
+
+# Conversation log: one JSON record per line, replayed by load_conversation.
+#   {"op": "msg", "msg": {...}}                       - a new message
+#   {"op": "summary", "through": id, "msg": {...}}    - summary replaces messages up to id
+#   {"op": "truncate", "through": id}                 - messages up to id were dropped
+# Each save appends only what's new; a background compaction rewrites the log
+# as plain "msg" records of the current conversation.
+
+_conv_log_lock = threading.Lock()
+_conv_log_through = 0     # highest message id in the log
+_conv_log_truncated = 0   # highest id dropped by a truncate record
+_conv_log_records = 0     # records appended since the last compaction
+_conv_log_compacting = False
+
+def _replay_conversation_log():
+    msgs = []
+    with open(CONVERSATION_LOG_FILE, 'rb') as f:
+        data = f.read()
+    if data and not data.endswith(b"\n"):
+        # Crash mid-append: drop the partial record so the next append starts clean
+        data = data[:data.rfind(b"\n") + 1]
+        with open(CONVERSATION_LOG_FILE, 'r+b') as f:
+            f.truncate(len(data))
+    for line in data.splitlines():
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        op = record.get("op")
+        if op == "msg":
+            msgs.append(record["msg"])
+        elif op == "summary":
+            msgs = [record["msg"]] + [m for m in msgs if m.get("id", 0) > record["through"]]
+        elif op == "truncate":
+            msgs = [m for m in msgs if m.get("id", 0) > record["through"]]
+    return msgs[-MAX_CONVERSATION_HISTORY:]
+
+def _write_conversation_snapshot(path, msgs):
+    with open(path, 'w') as f:
+        f.write("".join(json.dumps({"op": "msg", "msg": m}) + "\n" for m in msgs))
+        f.flush()
+        os.fsync(f.fileno())
+
+def _compact_conversation_log(snapshot, size):
+    """Rewrite the log as a snapshot plus whatever was appended after it was taken."""
+    global _conv_log_records, _conv_log_compacting
+    tmp_path = CONVERSATION_LOG_FILE + ".tmp"
+    try:
+        _write_conversation_snapshot(tmp_path, snapshot)
+        with _conv_log_lock:
+            with open(CONVERSATION_LOG_FILE, 'rb') as f:
+                f.seek(size)
+                tail = f.read()
+            with open(tmp_path, 'ab') as f:
+                f.write(tail)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, CONVERSATION_LOG_FILE)
+            _conv_log_records = tail.count(b"\n")
+    except Exception as e:
+        safe_print(f"{C.DIM}Conversation log compaction failed: {e}{C.RESET}")
+    finally:
+        _conv_log_compacting = False
+
 def save_conversation(messages):
     """Save conversation, summarizing if needed. Returns the (possibly modified) messages list."""
-    # Archive new messages incrementally (last 2 = most recent exchange)
-    if ARCHIVE_AVAILABLE and len(messages) >= 2:
+    global _conv_log_through, _conv_log_truncated, _conv_log_records, _conv_log_compacting
+    if _pipe_mode:
+        return messages  # Clone conversations aren't kept
+    _assign_message_ids(messages)
+
+    # Archive each message exactly once, tracked by the archive's high-water mark
+    if ARCHIVE_AVAILABLE:
         try:
-            # Archive the last 2 messages (user + assistant) if not already archived
-            recent = [m for m in messages[-2:] if m.get("role") != "system"]
-            archive_messages(recent)
+            archive_messages(_messages_after(messages, get_high_water()))
         except Exception:
             pass  # Don't fail save on archive errors
-    
-    # First, maybe summarize old messages (modifies in place)
+
+    new_messages = _messages_after(messages, _conv_log_through)
+    first = _first_conversation_message(messages)
+
+    # Then swap in a background summary of old messages if one is ready (modifies in place)
     messages = maybe_summarize_conversation(messages)
 
-    # Then save (still truncate as safety net)
-    to_save = [m for m in messages if m["role"] != "system"][-MAX_CONVERSATION_HISTORY:]
+    # Then append what changed to the conversation log
+    records = [{"op": "msg", "msg": m} for m in new_messages]
+    summary = _first_conversation_message(messages)
+    if summary is not first and summary is not None:
+        records.append({"op": "summary", "through": summary["id"], "msg": summary})
+    if len(messages) > MAX_CONVERSATION_HISTORY:
+        # Still truncate as safety net
+        non_system = [m for m in messages if m["role"] != "system"]
+        if len(non_system) > MAX_CONVERSATION_HISTORY:
+            dropped_through = non_system[-MAX_CONVERSATION_HISTORY - 1]["id"]
+            if dropped_through > _conv_log_truncated:
+                records.append({"op": "truncate", "through": dropped_through})
+                _conv_log_truncated = dropped_through
+    if not records:
+        return messages
+
     try:
-        with open(CONVERSATION_FILE, 'w') as f:
-            json.dump({"messages": to_save, "saved_at": datetime.now().isoformat()}, f, indent=2)
+        with _conv_log_lock:
+            with open(CONVERSATION_LOG_FILE, 'a') as f:
+                f.write("".join(json.dumps(r) + "\n" for r in records))
+            if new_messages:
+                _conv_log_through = new_messages[-1]["id"]
+            _conv_log_records += len(records)
+            if _conv_log_records >= CONVERSATION_LOG_COMPACT_RECORDS and not _conv_log_compacting:
+                _conv_log_compacting = True
+                snapshot = [dict(m) for m in messages if m["role"] != "system"][-MAX_CONVERSATION_HISTORY:]
+                size = os.path.getsize(CONVERSATION_LOG_FILE)
+                threading.Thread(target=_compact_conversation_log, args=(snapshot, size),
+                                 name="conversation-compactor", daemon=True).start()
     except Exception:
         pass  # Ignore conversation save errors
 
     return messages
 
 def load_conversation():
-    if not os.path.exists(CONVERSATION_FILE):
-        return []
+    global _next_message_id, _conv_log_through
     try:
-        with open(CONVERSATION_FILE, 'r') as f:
-            data = json.load(f)
-        msgs = data.get("messages", [])
+        if os.path.exists(CONVERSATION_LOG_FILE):
+            msgs = _replay_conversation_log()
+            legacy_file = False
+        elif os.path.exists(CONVERSATION_FILE):
+            with open(CONVERSATION_FILE, 'r') as f:
+                data = json.load(f)
+            msgs = data.get("messages", [])
+            legacy_file = True
+        else:
+            return []
         if msgs:
             print(f"  Loaded {len(msgs)} messages from previous session")
+        # Continue numbering after the saved messages. Files from before ids
+        # existed were archived by the old writer - number them and mark them done.
+        high_water = get_high_water() if ARCHIVE_AVAILABLE else 0
+        last_id = max([m["id"] for m in msgs if m.get("id") is not None] + [high_water])
+        _next_message_id = last_id + 1
+        legacy = [m for m in msgs if m.get("id") is None]
+        if legacy:
+            _assign_message_ids(msgs)
+            if ARCHIVE_AVAILABLE:
+                mark_archived(_next_message_id - 1)
+        _conv_log_through = max([m["id"] for m in msgs] + [0])
+        if legacy_file:
+            # Move to the append-only log
+            tmp_path = CONVERSATION_LOG_FILE + ".tmp"
+            _write_conversation_snapshot(tmp_path, msgs)
+            os.replace(tmp_path, CONVERSATION_LOG_FILE)
+            os.remove(CONVERSATION_FILE)
         return msgs
     except Exception:
         return []  # Return empty on load error
@@ -1077,6 +1263,7 @@ def write_file(rat, contents):
         success, error = safe_self_edit(path, content)
         if not success:
             return f"WRITE FAILED: {error}. File rolled back."
+        notify_rag(path)
         return "NEXT_ACTION"
 
     # Regular file write
@@ -1085,6 +1272,7 @@ def write_file(rat, contents):
         os.makedirs(parent, exist_ok=True)
     with open(path, 'w') as f:
         f.write(content)
+    notify_rag(path)
     return "NEXT_ACTION"
 def edit_file(rat, contents):
     lines_list = contents.split('\n')
@@ -1155,6 +1343,7 @@ def _edit_search_replace(path, rest):
                 return f"EDIT FAILED: {error}. Rolled back."
             safe_print(f"{C.GREEN}✅ main.py validated{C.RESET}")
         
+        notify_rag(path)
         added = len(new_text.split('\n'))
         removed = len(old_text.split('\n'))
         return f"Replaced {removed} lines with {added} lines. NEXT_ACTION"
@@ -1202,6 +1391,7 @@ def _edit_line_number(path, lines_list):
                 return f"EDIT FAILED: {error}. Rolled back."
             safe_print(f"{C.GREEN}✅ main.py validated{C.RESET}")
         
+        notify_rag(path)
         return f"Replaced lines {start}-{end}. NEXT_ACTION"
     except Exception as e:
         return f"Error: {e}"
@@ -1211,6 +1401,7 @@ def delete_file(rat, path):
         os.remove(path.strip())
     except Exception:
         pass  # File may not exist
+    notify_rag(path)
     return "NEXT_ACTION"
 
 def append_file(rat, contents):
@@ -1222,6 +1413,7 @@ def append_file(rat, contents):
         os.makedirs(parent, exist_ok=True)
     with open(path, 'a') as f:
         f.write(content)
+    notify_rag(path)
     return "NEXT_ACTION"
 
 def list_directory(rat, path):
@@ -1242,35 +1434,27 @@ def list_directory(rat, path):
         return f"Error: {e}"
 
 def save_memory(rat, contents):
-    mem = {}
-    if os.path.exists(MEMORY_FILE):
-        try:
-            with open(MEMORY_FILE, 'r') as f:
-                mem = json.load(f)
-        except Exception:
-            pass  # Use empty dict on load error
     lines = contents.strip().split("\n", 1)
     key = lines[0].strip()
     val = lines[1] if len(lines) > 1 else ""
-    mem[key] = {"value": val, "ts": datetime.now().isoformat()}
-    with open(MEMORY_FILE, 'w') as f:
-        json.dump(mem, f, indent=2)
+    get_memory_store().put(key, val)  # RAG is notified once the JSON mirror catches up
     safe_print(f"💾 {key}")
     return "NEXT_ACTION"
 
 def read_memory(rat, key):
-    if not os.path.exists(MEMORY_FILE):
-        return "No memories yet."
-    with open(MEMORY_FILE, 'r') as f:
-        mem = json.load(f)
+    store = get_memory_store()
     key = key.strip()
-    if not key or key.upper() == "ALL":
-        out = "=== All Memories ===\n"
+    if not key or key.upper() == "ALL" or key.endswith("*"):
+        mem = store.all() if not key.endswith("*") else store.with_prefix(key[:-1])
+        if not mem:
+            return "No memories yet." if not key.endswith("*") else f"No memories matching: {key}"
+        out = "=== All Memories ===\n" if not key.endswith("*") else f"=== Memories: {key} ===\n"
         for k, v in mem.items():
-            out += f"[{k}]: {v['value']}\n"
+            out += f"[{k}]: {v['value'] if isinstance(v, dict) else v}\n"
         return out
-    if key in mem:
-        return f"[{key}]: {mem[key]['value']}"
+    entry = store.get(key)
+    if entry is not None:
+        return f"[{key}]: {entry['value'] if isinstance(entry, dict) else entry}"
     return f"No memory: {key}"
 
 def search_files(rat, contents):
@@ -1335,8 +1519,8 @@ def search_self(rat, query):
 
 def read_logs(rat, content):
     """Read recent console logs for debugging."""
-    log_path = Path("data/console_log.txt")
-    if not log_path.exists():
+    iga_log.flush()
+    if not os.path.exists(iga_log.LOG_FILE):
         return "No logs yet - console_log.txt doesn't exist"
     
     try:
@@ -1344,8 +1528,7 @@ def read_logs(rat, content):
     except ValueError:
         lines = 50
     
-    all_lines = log_path.read_text().splitlines()
-    recent = all_lines[-lines:] if len(all_lines) > lines else all_lines
+    recent = iga_log.read_recent(lines)
     return f"Last {len(recent)} log lines:\n" + "\n".join(recent)
 
 def build_post_dream_prompt(dream_content):
@@ -1533,8 +1716,11 @@ def sleep_action(rat, contents):
 
     # Re-index RAG files before sleep so embeddings are fresh on wake
     if RAG_AVAILABLE:
-        safe_print("📚 Re-indexing RAG files before sleep...")
-        index_files()
+        if request_full_scan():
+            safe_print("📚 Queued RAG re-index (background)...")
+        else:
+            safe_print("📚 Re-indexing RAG files before sleep...")
+            index_files()
 
     minutes = seconds // 60
     safe_print(f"😴 Sleeping for {minutes} minute(s)...")
@@ -1553,63 +1739,142 @@ def set_mode(rat, contents):
 # CORE MESSAGE PROCESSING
 # ─────────────────────────────────────────────────────────────
 
-def parse_response(response):
-    """Parse response, supporting multiple actions in sequence."""
-    lines = response.split("\n")
-    current_key = ''
-    rationale = ''
-    actions = []  # List of (action, content) tuples
-    current_action = ''
-    current_content = ''
-    foundRationale = False
-
-    for line in lines:
-        if line.startswith("RATIONALE") and not foundRationale:
-            current_key = "RATIONALE"
-            foundRationale = True
+class ResponseParser:
+    """Incremental parse_response: feed() text as it streams in and get back each
+    (action, content) as soon as the next action header (or close()) ends it."""
+
+    def __init__(self):
+        self.rationale = ''
+        self.actions = []  # List of (action, content) tuples
+        self._partial = ''  # text after the last newline
+        self._current_key = ''
+        self._current_action = ''
+        self._current_content = ''
+        self._found_rationale = False
+
+    def _line(self, line):
+        """Handle one complete line. Returns the action it finished, if any."""
+        finished = None
+        if line.startswith("RATIONALE") and not self._found_rationale:
+            self._current_key = "RATIONALE"
+            self._found_rationale = True
         elif line.strip() in ACTIONS:
             # Save previous action if exists
-            if current_action:
-                actions.append((current_action, current_content.rstrip('\n')))
-                current_content = ''
-            current_action = line.strip()
-            current_key = current_action
-        elif current_key == "RATIONALE":
-            rationale += line + "\n"
-        elif current_action and current_key == current_action:
-            current_content += line + '\n'
-
-    # Don't forget the last action
-    if current_action:
-        actions.append((current_action, current_content.rstrip('\n')))
-    
-    result = {
-        "rationale": rationale,
-        "response_raw": response,
-        "actions": actions,  # New: list of (action, content) tuples
-        # Backwards compatibility: first action as primary
-        "action": actions[0][0] if actions else '',
-        "content": actions[0][1] if actions else '',
-    }
-    
-    # Backwards compatibility: second_action for TALK_TO_USER failsafe
-    if len(actions) >= 2 and actions[0][0] == "TALK_TO_USER":
-        result["second_action"] = actions[1][0]
-        result["second_content"] = actions[1][1]
-        safe_print(f"{C.DIM}⚠️ Failsafe: TALK_TO_USER + {actions[1][0]}{C.RESET}")
-    
-    return result
+            if self._current_action:
+                finished = (self._current_action, self._current_content.rstrip('\n'))
+                self.actions.append(finished)
+                self._current_content = ''
+            self._current_action = line.strip()
+            self._current_key = self._current_action
+        elif self._current_key == "RATIONALE":
+            self.rationale += line + "\n"
+        elif self._current_action and self._current_key == self._current_action:
+            self._current_content += line + '\n'
+        return finished
+
+    def feed(self, text):
+        """Add streamed text. Returns the actions completed by it."""
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        return [a for a in map(self._line, lines) if a]
+
+    def close(self):
+        """End of response. Returns the actions completed by it (the last one)."""
+        finished = [a for a in [self._line(self._partial)] if a]
+        self._partial = ''
+        # Don't forget the last action
+        if self._current_action:
+            finished.append((self._current_action, self._current_content.rstrip('\n')))
+            self.actions.append(finished[-1])
+            self._current_action = ''
+        return finished
+
+    def result(self, response):
+        actions = self.actions
+        result = {
+            "rationale": self.rationale,
+            "response_raw": response,
+            "actions": actions,  # New: list of (action, content) tuples
+            # Backwards compatibility: first action as primary
+            "action": actions[0][0] if actions else '',
+            "content": actions[0][1] if actions else '',
+        }
+
+        # Backwards compatibility: second_action for TALK_TO_USER failsafe
+        if len(actions) >= 2 and actions[0][0] == "TALK_TO_USER":
+            result["second_action"] = actions[1][0]
+            result["second_content"] = actions[1][1]
+            safe_print(f"{C.DIM}⚠️ Failsafe: TALK_TO_USER + {actions[1][0]}{C.RESET}")
+
+        return result
+
+def parse_response(response):
+    """Parse response, supporting multiple actions in sequence."""
+    parser = ResponseParser()
+    parser.feed(response)
+    parser.close()
+    return parser.result(response)
+
+
+def _index_message_archive():
+    """Index the message archive for self-reflection (background indexer startup job)."""
+    try:
+        from tools.index_message_archive import index_archive
+        index_archive()
+    except Exception as e:
+        safe_print(f"{C.DIM}Message archive indexing skipped: {e}{C.RESET}")
 
+def start_rag_indexer():
+    """Start the background RAG indexer; archive indexing rides along when enough new messages piled up."""
+    jobs = [_index_message_archive] if needs_reindex() else []
+    start_background_indexer(startup_jobs=jobs)
+    get_memory_store().subscribe(lambda keys: notify_rag(MEMORY_FILE))
+    try:
+        from tools.shutdown_handler import register_shutdown_callback
+        register_shutdown_callback(get_memory_store().flush)
+        register_shutdown_callback(stop_background_indexer)
+    except Exception:
+        pass
 
-def process_message(messages):
+def notify_rag(path):
+    """Let the background RAG indexer know a file changed."""
+    if RAG_AVAILABLE:
+        try:
+            notify_file_changed(path.strip())
+        except Exception:
+            pass  # Indexing is best-effort
+
+# Per-action-chain RAG memo: {(normalized_query, top_k): (index_version, items)}
+# Cleared at the start of each top-level handle_action call.
+_rag_chain_cache = {}
+
+def retrieve_context_cached(query, top_k=10):
+    """retrieve_context, memoized for the current action chain until the index changes."""
+    key = (" ".join(query.lower().split()), top_k)
+    version = get_index_version()
+    cached = _rag_chain_cache.get(key)
+    if cached and cached[0] == version:
+        return cached[1]
+    items = retrieve_context(query, top_k=top_k)
+    _rag_chain_cache[key] = (version, items)
+    return items
+
+def process_message(messages, on_action=None):
+    """Ask the main model for the next step. With on_action and STREAM_RESPONSES,
+    the reply is streamed and on_action(action, content, rationale) is called
+    for each action as soon as its block is complete. On failure, response_raw
+    holds whatever part of the reply was streamed."""
+    streamed = []
     try:
         system_content = ""
-        api_messages = []
+        rag_context = None
+        conversation = []
         for msg in messages:
             if msg["role"] == "system":
                 system_content = msg["content"]
             else:
-                api_messages.append(msg)
+                conversation.append(msg)
+        api_messages = [{"role": m["role"], "content": m["content"]} for m in conversation]
 
         # RAG: Retrieve relevant context based on recent user messages
         if RAG_AVAILABLE:
@@ -1633,28 +1898,59 @@ def process_message(messages):
                     else:
                         query = " ".join([m["content"][:200] for m in recent_user_msgs])
 
-                    context_items = retrieve_context(query, top_k=10)
+                    context_items = retrieve_context_cached(query, top_k=10)
                     if context_items:
                         rag_context = format_context_for_prompt(context_items)
-                        system_content = system_content + "\n\n" + rag_context
+                        if not PROMPT_CACHE:
+                            system_content = system_content + "\n\n" + rag_context
                         safe_print(f"{C.DIM}🔍 RAG: Retrieved {len(context_items)} relevant chunks{C.RESET}")
             except Exception as e:
                 safe_print(f"{C.DIM}RAG retrieval skipped: {e}{C.RESET}")
 
-        content, usage = openrouter_client.chat(
+        # Keep the prompt under the token budget: oldest turns go first
+        system_tokens = text_tokens(system_content)
+        if PROMPT_CACHE and rag_context:
+            system_tokens += text_tokens(rag_context)
+        kept, dropped = fit_to_budget(conversation, CONTEXT_TOKEN_BUDGET - system_tokens - RESPONSE_MAX_TOKENS)
+        if dropped:
+            safe_print(f"{C.DIM}✂️ Trimmed {dropped} old messages to fit the {CONTEXT_TOKEN_BUDGET:,}-token budget{C.RESET}")
+            api_messages = [{"role": m["role"], "content": m["content"]} for m in kept]
+        prompt_tokens = system_tokens + sum(message_tokens(m) for m in kept)
+
+        request = dict(
             model=MAIN_MODEL,
             system=system_content,
             messages=api_messages,
-            max_tokens=2048
+            max_tokens=RESPONSE_MAX_TOKENS,
+            cache=PROMPT_CACHE,
+            context=rag_context if PROMPT_CACHE else None
         )
+        if on_action and STREAM_RESPONSES:
+            # Actions finished mid-stream are exactly the leading actions of the
+            # final parse: only the last block can be touched by the strip() below
+            parser = ResponseParser()
+            started = []
+            def on_text(delta):
+                if not started:
+                    delta = delta.lstrip()
+                    if not delta:
+                        return
+                    started.append(True)
+                streamed.append(delta)
+                for act, cont in parser.feed(delta):
+                    on_action(act, cont, parser.rationale)
+            content, usage = openrouter_client.chat_stream(on_text=on_text, **request)
+        else:
+            content, usage = openrouter_client.chat(**request)
         generated_response = content.strip()
         parsed_response = parse_response(generated_response)
         parsed_response["success"] = True
         parsed_response["usage"] = usage  # Include cost info
+        parsed_response["prompt_tokens"] = prompt_tokens  # Local estimate
         return parsed_response
     except Exception as error:
         throttled_error(str(error))
-    return {"success": False}
+    return {"success": False, "response_raw": "".join(streamed).strip()}
 
 def check_passive_messages(messages):
     """Check input_queue for pending messages and inject them as passive awareness."""
@@ -1710,32 +2006,14 @@ def handle_action(messages, _depth=0):
         safe_print(f"{C.RED}⚠️ Max recursion depth reached. Stopping action chain.{C.RESET}")
         return messages
 
+    if _depth == 0:
+        _rag_chain_cache.clear()  # RAG memo is scoped to one action chain
+
     # Note: output target (source, chat_id) should be set by the caller before
     # calling handle_action. See interactive_mode() which calls set_output_target()
     # before handle_action() for proper per-message routing.
 
     try:
-        response_data = process_message(messages)
-        if not response_data["success"]:
-            safe_print("Failed to process message.")
-            return messages
-
-        messages.append({"role": "assistant", "content": response_data["response_raw"]})
-        messages = save_conversation(messages)  # Save after each action (may summarize)
-
-        # Display cost info if available
-        usage = response_data.get("usage")
-        if usage:
-            safe_print(f"{C.DIM}💰 ${usage['cost']:.4f} | Today: ${usage['daily_cost']:.4f}{C.RESET}")
-
-        action = response_data["action"]
-        rat = response_data["rationale"]
-        content = response_data["content"]
-
-        # Check for failsafe second action
-        second_action = response_data.get("second_action")
-        second_content = response_data.get("second_content", "")
-
         action_map = {
             "RUN_SHELL_COMMAND": lambda r, c: run_shell_command(r, c),
             "THINK": lambda r, c: think(r, c),
@@ -1778,22 +2056,24 @@ def handle_action(messages, _depth=0):
                 safe_print(f"{C.RED}⚠️ Action {action_name} failed: {e}{C.RESET}")
                 return f"ACTION FAILED: {action_name} raised {type(e).__name__}: {e}"
 
-        # Execute all actions in sequence (multi-action batching!)
-        actions_to_run = response_data.get("actions", [(action, content)])
         accumulated_results = []
-        
-        for i, (act, cont) in enumerate(actions_to_run):
+        chain = {"ran": 0, "stop": False, "defer": False}
+
+        def run_action(act, cont, rat, total=None):
+            """Run the next action of the reply. Sets chain["stop"] when the chain must end."""
+            chain["ran"] += 1
             if is_sleeping():
-                break
-                
-            if len(actions_to_run) > 1:
-                safe_print(f"{C.DIM}▶️ Action {i+1}/{len(actions_to_run)}: {act}{C.RESET}")
-            
+                chain["stop"] = True
+                return
+
+            if (total or chain["ran"]) > 1:
+                safe_print(f"{C.DIM}▶️ Action {chain['ran']}{f'/{total}' if total else ''}: {act}{C.RESET}")
+
             if act == "TALK_TO_USER":
                 talk_to_user(rat, cont)
             elif act == "RESTART_SELF":
                 restart_self(rat, cont)
-                break  # Restart exits
+                chain["stop"] = True  # Restart exits
             elif act in action_map:
                 result = safe_execute(act, rat, cont)
                 if result:
@@ -1802,6 +2082,69 @@ def handle_action(messages, _depth=0):
                     accumulated_results.append(f"[{act}]: {result[:max_len]}")
             else:
                 safe_print(f"{C.YELLOW}Unknown action: {act}{C.RESET}")
+
+        # Streamed actions run on a worker so a slow action doesn't stall reading
+        # the stream (and time it out); the worker answers to the same output target
+        streamed_actions = queue.Queue()
+        output_target = get_output_target()
+
+        def run_streamed_actions():
+            set_output_target(*output_target)
+            while True:
+                item = streamed_actions.get()
+                if item is None:
+                    return
+                act, cont, rat = item
+                # RESTART_SELF (and whatever follows it) waits until the reply is saved
+                if act == "RESTART_SELF":
+                    chain["defer"] = True
+                if chain["stop"] or chain["defer"]:
+                    continue
+                try:
+                    run_action(act, cont, rat)
+                except Exception as e:
+                    safe_print(f"{C.RED}⚠️ Streamed action {act} failed: {type(e).__name__}: {e}{C.RESET}")
+                    chain["stop"] = True
+
+        action_worker = threading.Thread(target=run_streamed_actions, name="stream-actions", daemon=True)
+        action_worker.start()
+        try:
+            response_data = process_message(messages, on_action=lambda *action: streamed_actions.put(action))
+        finally:
+            streamed_actions.put(None)
+            action_worker.join()
+
+        if not response_data["success"]:
+            safe_print("Failed to process message.")
+            if not chain["ran"]:
+                return messages
+            # The stream broke after some actions already ran: keep what was said and done
+            messages.append({"role": "assistant", "content": response_data["response_raw"]})
+            if accumulated_results:
+                accumulated_results.append("[Reply was cut off: only the actions above ran]")
+                messages.append({"role": "user", "content": "\n".join(accumulated_results)})
+            return save_conversation(messages)
+
+        messages.append({"role": "assistant", "content": response_data["response_raw"]})
+        messages = save_conversation(messages)  # Save after each action (may summarize)
+
+        # Display cost info if available
+        usage = response_data.get("usage")
+        if usage:
+            cached = f", {usage['cache_read_tokens']:,} cached" if usage.get('cache_read_tokens') else ""
+            safe_print(f"{C.DIM}💰 ${usage['cost']:.4f} | Today: ${usage['daily_cost']:.4f} | "
+                       f"Prompt: {usage.get('tokens_in', 0):,} tok (est. {response_data.get('prompt_tokens', 0):,}{cached}){C.RESET}")
+
+        action = response_data["action"]
+        rat = response_data["rationale"]
+        content = response_data["content"]
+
+        # Execute all actions in sequence (multi-action batching!) - the rest of them, if streamed
+        actions_to_run = response_data.get("actions", [(action, content)])
+        for act, cont in actions_to_run[chain["ran"]:]:
+            if chain["stop"]:
+                break
+            run_action(act, cont, rat, total=len(actions_to_run))
         
         # After all actions, recurse with combined results if any
         if accumulated_results and not is_sleeping():
@@ -1856,6 +2199,9 @@ def handle_slash_command(cmd, source, chat_id):
     elif cmd == '/status':
         sleep_mins = state.get('sleep_cycle_minutes', 30)
         msg = f"Mode: {state['mode']} | Tick: {state['tick_interval']}s | Sleep cycle: {sleep_mins}m | Task: {state.get('current_task', 'None')}"
+        connections = iga_http.format_metrics()
+        if connections:
+            msg += f"\n🔌 {connections}"
         safe_print(msg)
         if source == "telegram":
             telegram_send(chat_id, msg)
@@ -1981,17 +2327,10 @@ def interactive_loop():
     except Exception as e:
         safe_print(f"{C.DIM}Shutdown handler not registered: {e}{C.RESET}")
 
-    # Initialize RAG system
+    # Initialize RAG system (indexing runs in the background, never blocks startup)
     if RAG_AVAILABLE:
         if init_rag():
-            if needs_reindex():
-                index_files()
-                # Also index message archive for self-reflection
-                try:
-                    from tools.index_message_archive import index_archive
-                    index_archive()
-                except Exception as e:
-                    safe_print(f"{C.DIM}Message archive indexing skipped: {e}{C.RESET}")
+            start_rag_indexer()
         else:
             safe_print(f"{C.YELLOW}RAG initialization failed, continuing without RAG{C.RESET}")
 
@@ -2129,17 +2468,10 @@ def _init_autonomous_session():
     # CRITICAL: Mark this version as known-good since we started successfully
     mark_as_known_good()
 
-    # Initialize RAG system
+    # Initialize RAG system (indexing runs in the background, never blocks startup)
     if RAG_AVAILABLE:
         if init_rag():
-            if needs_reindex():
-                index_files()
-                # Also index message archive for self-reflection
-                try:
-                    from tools.index_message_archive import index_archive
-                    index_archive()
-                except Exception as e:
-                    safe_print(f"{C.DIM}Message archive indexing skipped: {e}{C.RESET}")
+            start_rag_indexer()
         else:
             safe_print(f"{C.YELLOW}RAG initialization failed, continuing without RAG{C.RESET}")
 
@@ -2219,6 +2551,34 @@ def _determine_wake_reason(pending):
     return "console input"
 
 
+def _wait_for_input(timeout):
+    """Block until input arrives or timeout seconds pass. Returns pending messages (maybe none)."""
+    try:
+        first = input_queue.get(timeout=max(0.0, timeout))
+    except queue.Empty:
+        return []
+    return [first] + _drain_input_queue()
+
+
+def _heartbeat_if_due(now, last_heartbeat):
+    """Touch the heartbeat file if HEARTBEAT_INTERVAL has passed. Returns the last heartbeat time."""
+    if now - last_heartbeat >= HEARTBEAT_INTERVAL:
+        update_heartbeat()
+        return now
+    return last_heartbeat
+
+
+def _next_deadline(state, last_autonomous, last_heartbeat):
+    """Earliest time the loop has something to do without input: heartbeat, tick or end of sleep."""
+    deadlines = [last_heartbeat + HEARTBEAT_INTERVAL]
+    sleep_until = parse_sleep_until(state.get("sleep_until"))
+    if sleep_until:
+        deadlines.append(sleep_until)
+    elif state.get("mode") == "autonomous":
+        deadlines.append(last_autonomous + state["tick_interval"])  # no ticks while asleep
+    return min(deadlines)
+
+
 def _handle_sleep_state(state, pending, now, with_telegram):
     """Handle sleep state logic. Returns (should_continue_sleeping, state)."""
     sleep_until = parse_sleep_until(state.get("sleep_until"))
@@ -2396,7 +2756,9 @@ def autonomous_loop(with_telegram=True):
         # Start background threads
         console_thread = _start_background_threads(session, with_telegram)
 
-        # Main loop
+        # Main loop: block on the input queue until a message arrives or the next deadline
+        pending = []
+        last_heartbeat = 0.0
         while not stop_threads.is_set():
             try:
                 # Ensure console thread is alive
@@ -2405,13 +2767,13 @@ def autonomous_loop(with_telegram=True):
                 state = load_state()
                 now = time.time()
 
-                # Drain input queue
-                pending = _drain_input_queue()
+                # Heartbeat for runner (asleep too, or the heartbeat deadline stays in the past)
+                last_heartbeat = _heartbeat_if_due(now, last_heartbeat)
 
                 # Handle sleep state
                 should_sleep, state = _handle_sleep_state(state, pending, now, with_telegram)
                 if should_sleep:
-                    time.sleep(0.5)
+                    pending = _wait_for_input(_next_deadline(state, last_autonomous, last_heartbeat) - now)
                     continue
 
                 # Process slash commands
@@ -2424,18 +2786,17 @@ def autonomous_loop(with_telegram=True):
                 if pending:
                     messages = _process_regular_messages(messages, pending)
                     last_autonomous = time.time()
+                    pending = _drain_input_queue()
                     continue  # Skip tick check this iteration - we just processed input
 
-                # Heartbeat for runner
-                update_heartbeat()
-
                 # Autonomous tick - only when truly idle (no pending messages processed this iteration)
                 state = load_state()  # Reload to catch mode changes from handle_action
                 if state["mode"] == "autonomous" and (time.time() - last_autonomous) >= state["tick_interval"]:
                     messages = _handle_autonomous_tick(messages, state)
                     last_autonomous = time.time()  # Reset AFTER tick completes
+                    state = load_state()
 
-                time.sleep(0.1)
+                pending = _wait_for_input(_next_deadline(state, last_autonomous, last_heartbeat) - time.time())
 
             except KeyboardInterrupt:
                 safe_print("\n💾 Goodbye!")
@@ -2443,6 +2804,7 @@ def autonomous_loop(with_telegram=True):
                 break
             except Exception as e:
                 throttled_error(str(e))
+                pending = []  # don't retry the input that failed
                 time.sleep(1)
 
         # Cleanup
@@ -2458,6 +2820,16 @@ def autonomous_loop(with_telegram=True):
 @click.option('--telegram/--no-telegram', '-t/-T', default=True, help='Enable/disable Telegram in autonomous mode')
 @click.option('--pipe', is_flag=True, help='Pipe mode: read stdin, respond once, exit')
 def chat_cli(mode, telegram, pipe):
+    global _pipe_mode
+    _pipe_mode = pipe
+    # Open the API connections while startup runs; long-running modes keep them warm
+    hosts = [openrouter_client.BASE_URL] + ([OPENAI_BASE_URL] if os.getenv("OPENAI_API_KEY") else [])
+    iga_http.prewarm(hosts, keep_warm=not pipe)
+    try:
+        from tools.shutdown_handler import register_shutdown_callback
+        register_shutdown_callback(iga_http.stop_keep_warm)
+    except Exception:
+        pass
     if pipe:
         # Clone mode: minimal context for fast responses
         system_prompt = get_file("system_instructions.txt")
@@ -6,11 +6,13 @@ import os
 import json
 from openai import OpenAI
 from datetime import datetime
+from iga_http import get_http_client
 
 # Initialize OpenRouter client (OpenAI-compatible)
 _client = None
 _daily_cost = 0.0
 _cost_log_file = "data/openrouter_costs.json"
+BASE_URL = "https://openrouter.ai/api/v1"
 
 def get_client():
     global _client
@@ -19,8 +21,9 @@ def get_client():
         if not api_key:
             raise ValueError("OPENROUTER_API_KEY not set")
         _client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=api_key
+            base_url=BASE_URL,
+            api_key=api_key,
+            http_client=get_http_client()  # shared keep-alive pool (see iga_http)
         )
     return _client
 
@@ -38,7 +41,7 @@ def save_cost_log(data):
     with open(_cost_log_file, 'w') as f:
         json.dump(data, f, indent=2)
 
-def log_cost(cost, model, tokens_in, tokens_out):
+def log_cost(cost, model, tokens_in, tokens_out, cache_read=0, cache_write=0):
     """Log a request's cost"""
     data = load_cost_log()
     today = datetime.now().strftime("%Y-%m-%d")
@@ -50,6 +53,8 @@ def log_cost(cost, model, tokens_in, tokens_out):
         "model": model,
         "tokens_in": tokens_in,
         "tokens_out": tokens_out,
+        "cache_read_tokens": cache_read,
+        "cache_write_tokens": cache_write,
         "cost": cost
     })
     
@@ -60,53 +65,108 @@ def log_cost(cost, model, tokens_in, tokens_out):
     save_cost_log(data)
     return data["daily"][today]
 
-def chat(model, system, messages, max_tokens=2048):
+_HEADERS = {
+    "HTTP-Referer": "https://github.com/iga",
+    "X-Title": "Iga Autonomous Agent"
+}
+
+def _cache_breakpoint(content):
+    """Content as a text block marked as the end of a cacheable prefix."""
+    return [{"type": "text", "text": content, "cache_control": {"type": "ephemeral"}}]
+
+def _build_messages(system, messages, cache, context):
+    # Convert Anthropic-style messages to OpenAI format
+    openai_messages = []
+    if system:
+        openai_messages.append({"role": "system", "content": _cache_breakpoint(system) if cache else system})
+    openai_messages.extend(messages)
+    if cache and messages and isinstance(messages[-1].get("content"), str):
+        openai_messages[-1] = {**messages[-1], "content": _cache_breakpoint(messages[-1]["content"])}
+    if context:
+        openai_messages.append({"role": "user", "content": context})
+    return openai_messages
+
+def _record_usage(model, usage, cost):
+    """Log a request's cost and return the usage_info dict."""
+    tokens_in = usage.prompt_tokens if usage else 0
+    tokens_out = usage.completion_tokens if usage else 0
+    details = getattr(usage, 'prompt_tokens_details', None) if usage else None
+    cache_read = (getattr(details, 'cached_tokens', 0) or 0) if details else 0
+    cache_write = (getattr(details, 'cache_write_tokens', 0) or 0) if details else 0
+    
+    # OpenRouter includes cost in response (if available)
+    # Estimate otherwise based on opus-4.5 pricing
+    if cost is None:
+        # Estimate: $5/1M input, $25/1M output for opus-4.5; cache reads 0.1x, writes 1.25x input
+        uncached = max(tokens_in - cache_read - cache_write, 0)
+        cost = ((uncached * 5 + cache_read * 0.5 + cache_write * 6.25) / 1_000_000) + (tokens_out * 25 / 1_000_000)
+    
+    daily_cost = log_cost(cost, model, tokens_in, tokens_out, cache_read, cache_write)
+    
+    return {
+        "tokens_in": tokens_in,
+        "tokens_out": tokens_out,
+        "cache_read_tokens": cache_read,
+        "cache_write_tokens": cache_write,
+        "cost": cost,
+        "daily_cost": daily_cost
+    }
+
+def chat(model, system, messages, max_tokens=2048, cache=False, context=None):
     """
     Make a chat completion request via OpenRouter
     Returns (content, usage_info)
+
+    cache: mark the system prompt and the last message as cache breakpoints, so
+    the provider can reuse the prefix (system + conversation so far) next call.
+    context: per-call text (e.g. RAG results) sent as a trailing user message
+    after the breakpoints, where it doesn't invalidate the cached prefix.
     """
     client = get_client()
     
-    # Convert Anthropic-style messages to OpenAI format
-    openai_messages = []
-    if system:
-        openai_messages.append({"role": "system", "content": system})
-    openai_messages.extend(messages)
-    
     response = client.chat.completions.create(
         model=model,
-        messages=openai_messages,
+        messages=_build_messages(system, messages, cache, context),
         max_tokens=max_tokens,
         timeout=120,  # 2 minute timeout to prevent hanging
-        extra_headers={
-            "HTTP-Referer": "https://github.com/iga",
-            "X-Title": "Iga Autonomous Agent"
-        }
+        extra_headers=_HEADERS
     )
     
     # Extract content
     content = response.choices[0].message.content
     
-    # Extract usage
-    usage = response.usage
-    tokens_in = usage.prompt_tokens if usage else 0
-    tokens_out = usage.completion_tokens if usage else 0
+    return content, _record_usage(model, response.usage, getattr(response, 'cost', None))
+
+def chat_stream(model, system, messages, max_tokens=2048, cache=False, context=None, on_text=None):
+    """
+    Streaming chat(): on_text(delta) is called with each piece of text as it
+    arrives. Returns (content, usage_info) once the completion is finished.
+    """
+    client = get_client()
     
-    # OpenRouter includes cost in response (if available)
-    # Estimate otherwise based on opus-4.5 pricing
-    cost = getattr(response, 'cost', None)
-    if cost is None:
-        # Estimate: $5/1M input, $25/1M output for opus-4.5
-        cost = (tokens_in * 5 / 1_000_000) + (tokens_out * 25 / 1_000_000)
+    stream = client.chat.completions.create(
+        model=model,
+        messages=_build_messages(system, messages, cache, context),
+        max_tokens=max_tokens,
+        timeout=120,  # 2 minute timeout to prevent hanging
+        extra_headers=_HEADERS,
+        stream=True,
+        stream_options={"include_usage": True}  # usage arrives in the last chunk
+    )
     
-    daily_cost = log_cost(cost, model, tokens_in, tokens_out)
+    parts = []
+    usage = None
+    for chunk in stream:
+        if chunk.choices:
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                if on_text:
+                    on_text(delta)
+        if getattr(chunk, 'usage', None):
+            usage = chunk.usage
     
-    return content, {
-        "tokens_in": tokens_in,
-        "tokens_out": tokens_out,
-        "cost": cost,
-        "daily_cost": daily_cost
-    }
+    return "".join(parts), _record_usage(model, usage, getattr(usage, 'cost', None))
 
 def get_daily_cost():
     """Get today's spending"""
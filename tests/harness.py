@@ -0,0 +1,62 @@
+"""
+Shared pieces of the script-style test suites in tests/: a pass/fail tally and
+a throwaway working directory (Iga's stores use paths relative to the cwd).
+"""
+
+import sys
+import os
+import tempfile
+import shutil
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+class TestResults:
+    def __init__(self):
+        self.passed = 0
+        self.failed = 0
+        self.errors = []
+
+    def ok(self, name):
+        print(f"  ✅ {name}")
+        self.passed += 1
+
+    def fail(self, name, reason=""):
+        print(f"  ❌ {name}: {reason}")
+        self.failed += 1
+        self.errors.append((name, reason))
+
+    def summary(self):
+        total = self.passed + self.failed
+        print(f"\n{'='*50}")
+        print(f"Results: {self.passed}/{total} passed")
+        if self.errors:
+            print("Failures:")
+            for name, reason in self.errors:
+                print(f"  - {name}: {reason}")
+        return self.failed == 0
+
+def enter_test_dir():
+    """Make a temp directory the cwd. Returns its path."""
+    test_dir = tempfile.mkdtemp(prefix="iga_test_")
+    print(f"Test directory: {test_dir}")
+    os.chdir(test_dir)
+    return test_dir
+
+def leave_test_dir(test_dir):
+    print(f"\n🧹 Cleaning up {test_dir}...")
+    os.chdir(REPO_DIR)
+    shutil.rmtree(test_dir, ignore_errors=True)
+
+def import_main():
+    """Import main without it flipping the live status page online."""
+    sys.modules.setdefault("tools.update_status", None)
+    import main
+    return main
+
+def message(role, content, msg_id=None):
+    m = {"role": role, "content": content}
+    if msg_id is not None:
+        m["id"] = msg_id
+    return m
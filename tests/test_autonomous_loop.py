@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test suite for the timing of Iga's event-driven autonomous loop.
+Run with: python tests/test_autonomous_loop.py
+"""
+
+import sys
+import os
+import time
+
+from harness import TestResults, enter_test_dir, leave_test_dir, import_main
+
+results = TestResults()
+TEST_DIR = enter_test_dir()
+
+try:
+    # ═══════════════════════════════════════════════════════════
+    # WAIT DEADLINES
+    # ═══════════════════════════════════════════════════════════
+    print("\n⏰ Wait Deadlines:")
+
+    main = import_main()
+
+    # While asleep the loop blocks on input until the next deadline. A deadline
+    # in the past makes that a zero timeout, and the loop spins at full CPU.
+    asleep = {
+        "sleeping": {"mode": "sleeping", "tick_interval": 60},
+        "autonomous_asleep": {"mode": "autonomous", "tick_interval": 60},
+    }
+    for name, state in asleep.items():
+        try:
+            now = time.time()
+            state["sleep_until"] = now + 3600
+            last_autonomous = now - 3600  # no ticks ran during the sleep
+            last_heartbeat = now - 5 * main.HEARTBEAT_INTERVAL
+            waits = []
+            for _ in range(3):  # consecutive passes of the loop's sleep branch
+                last_heartbeat = main._heartbeat_if_due(now, last_heartbeat)
+                waits.append(main._next_deadline(state, last_autonomous, last_heartbeat) - now)
+                now += waits[-1]
+            if all(w > 0 for w in waits):
+                results.ok(f"wait_positive_{name}")
+            else:
+                results.fail(f"wait_positive_{name}", f"waits: {waits}")
+        except Exception as e:
+            results.fail(f"wait_positive_{name}", str(e))
+
+    try:
+        if os.path.exists(main.HEARTBEAT_FILE):
+            results.ok("heartbeat_while_asleep")
+        else:
+            results.fail("heartbeat_while_asleep", "heartbeat file never touched")
+    except Exception as e:
+        results.fail("heartbeat_while_asleep", str(e))
+
+    # Awake in autonomous mode, the tick is the deadline once it's nearer than the heartbeat
+    try:
+        now = time.time()
+        state = {"mode": "autonomous", "tick_interval": 3, "sleep_until": None}
+        deadline = main._next_deadline(state, now, now)
+        if deadline == now + 3:
+            results.ok("tick_deadline_awake")
+        else:
+            results.fail("tick_deadline_awake", f"deadline in {deadline - now}s")
+    except Exception as e:
+        results.fail("tick_deadline_awake", str(e))
+
+finally:
+    leave_test_dir(TEST_DIR)
+
+success = results.summary()
+sys.exit(0 if success else 1)
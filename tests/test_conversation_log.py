@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Test suite for Iga's append-only conversation log (save, replay, crash recovery, migration).
+Run with: python tests/test_conversation_log.py
+"""
+
+import sys
+import os
+import json
+
+from harness import TestResults, enter_test_dir, leave_test_dir, import_main, message
+
+results = TestResults()
+TEST_DIR = enter_test_dir()
+
+def write_lines(path, records):
+    with open(path, 'w') as f:
+        f.write("".join(json.dumps(r) + "\n" for r in records))
+
+try:
+    # ═══════════════════════════════════════════════════════════
+    # CONVERSATION LOG
+    # ═══════════════════════════════════════════════════════════
+    print("\n💬 Conversation Log:")
+
+    main = import_main()
+    main.ARCHIVE_AVAILABLE = False  # the archive has its own suite
+    main.AUTO_EXTRACT_AVAILABLE = False
+
+    def reset_conversation_state():
+        main._next_message_id = None
+        main._conv_log_through = 0
+        main._conv_log_truncated = 0
+        main._conv_log_records = 0
+        for path in (main.CONVERSATION_LOG_FILE, main.CONVERSATION_FILE):
+            if os.path.exists(path):
+                os.remove(path)
+
+    # Save, then append, then replay
+    try:
+        reset_conversation_state()
+        messages = [message("system", "sys"), message("user", "hello"), message("assistant", "hi")]
+        messages = main.save_conversation(messages)
+        messages.append(message("user", "again"))
+        main.save_conversation(messages)
+        loaded = main.load_conversation()
+        if [(m["id"], m["content"]) for m in loaded] == [(1, "hello"), (2, "hi"), (3, "again")]:
+            results.ok("conversation_log_roundtrip")
+        else:
+            results.fail("conversation_log_roundtrip", f"got: {loaded}")
+    except Exception as e:
+        results.fail("conversation_log_roundtrip", str(e))
+
+    # A crash mid-append leaves a partial last line
+    try:
+        with open(main.CONVERSATION_LOG_FILE, 'a') as f:
+            f.write('{"op": "msg", "msg": {"role": "user", "cont')
+        loaded = main.load_conversation()
+        with open(main.CONVERSATION_LOG_FILE, 'rb') as f:
+            data = f.read()
+        if [m["id"] for m in loaded] != [1, 2, 3]:
+            results.fail("conversation_log_torn_tail", f"got: {loaded}")
+        elif not data.endswith(b"\n"):
+            results.fail("conversation_log_torn_tail", "partial record not cut")
+        else:
+            loaded.append(message("user", "after crash"))
+            main.save_conversation([message("system", "sys")] + loaded)
+            contents = [m["content"] for m in main.load_conversation()]
+            if contents == ["hello", "hi", "again", "after crash"]:
+                results.ok("conversation_log_torn_tail")
+            else:
+                results.fail("conversation_log_torn_tail", f"append after cut: {contents}")
+    except Exception as e:
+        results.fail("conversation_log_torn_tail", str(e))
+
+    # Summary and truncate records
+    try:
+        reset_conversation_state()
+        write_lines(main.CONVERSATION_LOG_FILE,
+                    [{"op": "msg", "msg": message("user", f"m{i}", i)} for i in range(1, 6)] +
+                    [{"op": "summary", "through": 3, "msg": message("user", "[CONVERSATION SUMMARY] m1-m3", 3)}])
+        loaded = main.load_conversation()
+        if [m["content"] for m in loaded] == ["[CONVERSATION SUMMARY] m1-m3", "m4", "m5"]:
+            results.ok("conversation_log_summary")
+        else:
+            results.fail("conversation_log_summary", f"got: {loaded}")
+
+        with open(main.CONVERSATION_LOG_FILE, 'a') as f:
+            f.write(json.dumps({"op": "truncate", "through": 4}) + "\n")
+        loaded = main.load_conversation()
+        if [m["content"] for m in loaded] == ["m5"] and main._next_message_id == 6:
+            results.ok("conversation_log_truncate")
+        else:
+            results.fail("conversation_log_truncate", f"got: {loaded}, next id {main._next_message_id}")
+    except Exception as e:
+        results.fail("conversation_log_summary", str(e))
+
+    # Pre-log single-file format
+    try:
+        reset_conversation_state()
+        with open(main.CONVERSATION_FILE, 'w') as f:
+            json.dump({"messages": [message("user", "old question"), message("assistant", "old answer")]}, f)
+        loaded = main.load_conversation()
+        if [(m["id"], m["content"]) for m in loaded] != [(1, "old question"), (2, "old answer")]:
+            results.fail("conversation_log_migration", f"got: {loaded}")
+        elif os.path.exists(main.CONVERSATION_FILE) or not os.path.exists(main.CONVERSATION_LOG_FILE):
+            results.fail("conversation_log_migration", "old file not moved to the log")
+        elif [m["content"] for m in main.load_conversation()] != ["old question", "old answer"]:
+            results.fail("conversation_log_migration", "migrated log doesn't replay")
+        else:
+            results.ok("conversation_log_migration")
+    except Exception as e:
+        results.fail("conversation_log_migration", str(e))
+
+    # A summary takes over the last summarized message's id: its token estimate must be its own
+    try:
+        from iga_context import message_tokens, estimate_tokens, MESSAGE_OVERHEAD_TOKENS
+        summary = "the summary of it all " * 20
+        summary_content = f"[CONVERSATION SUMMARY - 3 previous messages compressed]:\n{summary}"
+        messages = [message("system", "sys")] + [message("user", f"m{i}", i) for i in (1, 2)]
+        messages += [message("user", "7" * len(summary_content), 3)]  # same length, different tokens
+        messages += [message("assistant", f"m{i}", i) for i in (4, 5, 6)]
+        for m in messages:
+            message_tokens(m)
+        main._summary_job = {"first": 1, "through": 3, "count": 3, "batch": messages[1:4], "summary": summary}
+        saved_threshold, main.SUMMARIZE_THRESHOLD = main.SUMMARIZE_THRESHOLD, 4
+        try:
+            main.maybe_summarize_conversation(messages)
+        finally:
+            main.SUMMARIZE_THRESHOLD = saved_threshold
+        expected = estimate_tokens(summary_content) + MESSAGE_OVERHEAD_TOKENS
+        if messages[1]["content"] != summary_content:
+            results.fail("summary_token_estimate", f"summary not installed: {messages[1]}")
+        elif message_tokens(messages[1]) != expected:
+            results.fail("summary_token_estimate", f"{message_tokens(messages[1])} tokens, expected {expected}")
+        else:
+            results.ok("summary_token_estimate")
+    except Exception as e:
+        results.fail("summary_token_estimate", str(e))
+
+    # A background summary thrown away because the conversation moved on must not extract memories
+    try:
+        import time
+        import threading
+        extracted = []
+        main.AUTO_EXTRACT_AVAILABLE = True
+        main.extract_from_messages = lambda batch: extracted.append([m["id"] for m in batch]) or []
+        main.summarize_messages = lambda batch: f"summary of {len(batch)}"
+
+        def wait_for_summary():
+            deadline = time.time() + 5
+            while main._summary_job["summary"] is None and time.time() < deadline:
+                time.sleep(0.01)
+
+        saved_threshold, main.SUMMARIZE_THRESHOLD = main.SUMMARIZE_THRESHOLD, 4
+        try:
+            main._summary_job = None
+            messages = [message("system", "sys")] + [message("user", f"m{i}", i) for i in range(1, 8)]
+            main.maybe_summarize_conversation(messages)  # starts a job over ids 1-6
+            wait_for_summary()
+            del messages[1]  # truncated under the job
+            main.maybe_summarize_conversation(messages)  # discards it, starts one over ids 2-6
+            wait_for_summary()
+            main.maybe_summarize_conversation(messages)  # commits it
+        finally:
+            main.SUMMARIZE_THRESHOLD = saved_threshold
+        for thread in threading.enumerate():
+            if thread.name == "summary-extractor":
+                thread.join(timeout=5)
+        if extracted == [[2, 3, 4, 5, 6]] and messages[1]["content"].endswith("summary of 5"):
+            results.ok("summary_extracts_once")
+        else:
+            results.fail("summary_extracts_once", f"extracted {extracted}")
+    except Exception as e:
+        results.fail("summary_extracts_once", str(e))
+
+finally:
+    leave_test_dir(TEST_DIR)
+
+success = results.summary()
+sys.exit(0 if success else 1)
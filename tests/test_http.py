@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test suite for the shared HTTP transport's keep-warm pings (no network needed).
+Run with: python tests/test_http.py
+"""
+
+import sys
+import time
+import threading
+
+from harness import TestResults, enter_test_dir, leave_test_dir
+
+results = TestResults()
+TEST_DIR = enter_test_dir()
+
+try:
+    # ═══════════════════════════════════════════════════════════
+    # KEEP-WARM
+    # ═══════════════════════════════════════════════════════════
+    print("\n🔥 Keep-Warm:")
+
+    import iga_http
+
+    try:
+        now = time.monotonic()
+        iga_http._warm_hosts.update({
+            "https://fresh": now - 5,                                        # used recently
+            "https://idle": now - iga_http.KEEP_WARM_INTERVAL - 1,           # due a ping
+            "https://pinged": now - iga_http.KEEP_WARM_INTERVAL - 1,         # pinged recently
+            "https://asleep": now - iga_http.KEEP_WARM_IDLE_LIMIT - 1,       # no real traffic for ages
+        })
+        iga_http._last_warmed["https://pinged"] = now - 5
+        iga_http._last_warmed["https://asleep"] = now - iga_http.KEEP_WARM_INTERVAL - 1
+        due = iga_http._hosts_to_warm(now)
+        if due == ["https://idle"]:
+            results.ok("keep_warm_due_hosts")
+        else:
+            results.fail("keep_warm_due_hosts", f"got: {due}")
+    except Exception as e:
+        results.fail("keep_warm_due_hosts", str(e))
+    finally:
+        iga_http._warm_hosts.clear()
+        iga_http._last_warmed.clear()
+
+    try:
+        iga_http._keep_warm_stop.clear()
+        iga_http._keep_warm_thread = threading.Thread(target=iga_http._keep_warm_loop, daemon=True)
+        iga_http._keep_warm_thread.start()
+        thread = iga_http._keep_warm_thread
+        started = time.monotonic()
+        iga_http.stop_keep_warm()
+        iga_http.stop_keep_warm()
+        if thread.is_alive() or time.monotonic() - started > 1:
+            results.fail("keep_warm_stop", "thread didn't stop promptly")
+        else:
+            results.ok("keep_warm_stop")
+    except Exception as e:
+        results.fail("keep_warm_stop", str(e))
+
+finally:
+    leave_test_dir(TEST_DIR)
+
+success = results.summary()
+sys.exit(0 if success else 1)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test suite for Iga's SQLite memory store and its JSON mirror.
+Run with: python tests/test_memory_store.py
+"""
+
+import sys
+import json
+
+from harness import TestResults, enter_test_dir, leave_test_dir
+
+results = TestResults()
+TEST_DIR = enter_test_dir()
+
+try:
+    # ═══════════════════════════════════════════════════════════
+    # MEMORY STORE
+    # ═══════════════════════════════════════════════════════════
+    print("\n💾 Memory Store:")
+
+    from iga_memory import MemoryStore
+
+    def read_mirror():
+        with open("mem.json") as f:
+            return json.load(f)
+
+    try:
+        store = MemoryStore("mem.db", "mem.json")
+        store.put("alpha", "one")
+        store.flush()
+        if read_mirror().get("alpha", {}).get("value") == "one":
+            results.ok("memory_mirror_export")
+        else:
+            results.fail("memory_mirror_export", f"got: {read_mirror()}")
+    except Exception as e:
+        results.fail("memory_mirror_export", str(e))
+
+    # Hand edits to the mirror are merged back by key
+    try:
+        mirror = read_mirror()
+        mirror["alpha"]["value"] = "edited"
+        mirror["beta"] = {"value": "by hand", "ts": "2026-01-01T00:00:00"}
+        with open("mem.json", 'w') as f:
+            json.dump(mirror, f)
+        if store.get("alpha", {}).get("value") == "edited" and "beta" in MemoryStore("mem.db", "mem.json"):
+            results.ok("memory_mirror_import")
+        else:
+            results.fail("memory_mirror_import", f"got: {store.all()}")
+    except Exception as e:
+        results.fail("memory_mirror_import", str(e))
+
+    # Another process writes between our export and the next: nothing is lost
+    try:
+        other = MemoryStore("mem.db", "mem.json")
+        store.put("delta", "this process")
+        other.put("gamma", "other process")
+        store.flush()
+        mirror = read_mirror()
+        other.flush()
+        if {"alpha", "beta", "gamma", "delta"} <= set(mirror) and set(read_mirror()) == set(mirror):
+            results.ok("memory_mirror_two_writers")
+        else:
+            results.fail("memory_mirror_two_writers", f"mirror keys: {sorted(mirror)}")
+    except Exception as e:
+        results.fail("memory_mirror_two_writers", str(e))
+
+    # merge() deletes only what it's told to
+    try:
+        store.merge({"epsilon": {"value": "merged", "ts": None}}, delete=["beta"])
+        store.flush()
+        mirror = read_mirror()
+        reopened = MemoryStore("mem.db", "mem.json")
+        if "beta" in mirror or "epsilon" not in mirror or "gamma" not in mirror:
+            results.fail("memory_merge", f"mirror keys: {sorted(mirror)}")
+        elif set(reopened.keys()) != set(mirror):
+            results.fail("memory_merge", "database and mirror disagree")
+        else:
+            results.ok("memory_merge")
+    except Exception as e:
+        results.fail("memory_merge", str(e))
+
+finally:
+    leave_test_dir(TEST_DIR)
+
+success = results.summary()
+sys.exit(0 if success else 1)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test suite for Iga's segmented message archive (rotation, reads, search, id dedupe).
+Run with: python tests/test_message_archive.py
+"""
+
+import sys
+import os
+
+from harness import TestResults, enter_test_dir, leave_test_dir, message
+
+results = TestResults()
+TEST_DIR = enter_test_dir()
+
+try:
+    # ═══════════════════════════════════════════════════════════
+    # MESSAGE ARCHIVE
+    # ═══════════════════════════════════════════════════════════
+    print("\n📦 Message Archive:")
+
+    from tools import message_archive
+    from tools.message_archive import ArchiveWriter
+
+    # Rotation at SEGMENT_MAX_BYTES, then reads across closed and open segments
+    try:
+        saved_max = message_archive.SEGMENT_MAX_BYTES
+        message_archive.SEGMENT_MAX_BYTES = 200
+        try:
+            writer = ArchiveWriter(fsync="never")
+            for i in range(1, 11):
+                writer.submit([message("user", f"rotating needle {i}" if i == 7 else f"message {i}", i)])
+                writer.flush()
+            writer.close()
+        finally:
+            message_archive.SEGMENT_MAX_BYTES = saved_max
+        segments = message_archive.get_segments()
+        closed = [s for s in segments if s["closed"]]
+        if len(segments) < 2 or not closed:
+            results.fail("archive_segment_rotation", f"segments: {segments}")
+        elif not all(os.path.exists(message_archive._segment_path(s)) for s in segments):
+            results.fail("archive_segment_rotation", "segment file missing")
+        elif [m["id"] for m in message_archive.iter_archive()] != list(range(1, 11)):
+            results.fail("archive_segment_rotation", "messages out of order or lost")
+        else:
+            results.ok("archive_segment_rotation")
+
+        hits = message_archive.search_archive("rotating needle")
+        if [h["content"] for h in hits] == ["rotating needle 7"] and message_archive.get_archive_count() == 10:
+            results.ok("archive_search")
+        else:
+            results.fail("archive_search", f"got: {hits}")
+    except Exception as e:
+        results.fail("archive_segment_rotation", str(e))
+
+    # Two writers (like two processes) that both started at the same high-water mark
+    try:
+        first, second = ArchiveWriter(fsync="never"), ArchiveWriter(fsync="never")
+        first.submit([message("user", f"message {i}", i) for i in (11, 12, 13)])
+        first.flush()
+        second.submit([message("user", f"message {i}", i) for i in (12, 13, 14, 15)])
+        second.flush()
+        first.close()
+        second.close()
+        ids = [m["id"] for m in message_archive.iter_archive()]
+        if ids == list(range(1, 16)) and message_archive.get_high_water() == 15:
+            results.ok("archive_dedupe_across_writers")
+        else:
+            results.fail("archive_dedupe_across_writers", f"ids {ids}, high water {message_archive.get_high_water()}")
+    except Exception as e:
+        results.fail("archive_dedupe_across_writers", str(e))
+
+    # The catalog is rewritten on every flush: the RAG indexer must not pick it up
+    try:
+        import iga_rag
+        paths = [message_archive.CATALOG_FILE] + [message_archive._segment_path(s) for s in message_archive.get_segments()]
+        discovered = {os.path.normpath(p) for p in iga_rag._discover_all_files()}
+        if any(iga_rag._is_indexable(p) or os.path.normpath(p) in discovered for p in paths):
+            results.fail("archive_not_rag_indexed", "archive files are indexable")
+        else:
+            results.ok("archive_not_rag_indexed")
+    except Exception as e:
+        results.fail("archive_not_rag_indexed", str(e))
+
+finally:
+    leave_test_dir(TEST_DIR)
+
+success = results.summary()
+sys.exit(0 if success else 1)
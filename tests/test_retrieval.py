@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test suite for offline RAG retrieval: local hashing embeddings, the NumPy store,
+incremental indexing and BM25 + vector fusion. No network needed.
+Run with: python tests/test_retrieval.py
+"""
+
+import sys
+import os
+import math
+
+from harness import TestResults, enter_test_dir, leave_test_dir
+
+results = TestResults()
+TEST_DIR = enter_test_dir()
+
+os.environ["IGA_EMBEDDINGS"] = "local"
+os.environ["IGA_VECTOR_STORE"] = "numpy"
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+
+try:
+    # ═══════════════════════════════════════════════════════════
+    # LOCAL EMBEDDINGS
+    # ═══════════════════════════════════════════════════════════
+    print("\n🔢 Local Embeddings:")
+
+    from iga_embeddings import HashingEmbedder, get_provider, LOCAL_EMBEDDING_DIM
+
+    try:
+        text = "Iga indexes her own files for retrieval"
+        first, second = HashingEmbedder().embed([text])[0], HashingEmbedder().embed([text])[0]
+        other = HashingEmbedder().embed(["something else entirely"])[0]
+        if first != second or first == other:
+            results.fail("hashing_embedder_deterministic", "vectors differ across instances or collide")
+        else:
+            results.ok("hashing_embedder_deterministic")
+    except Exception as e:
+        results.fail("hashing_embedder_deterministic", str(e))
+
+    try:
+        provider = get_provider()  # from IGA_EMBEDDINGS
+        vector = provider.embed(["dimension check"])[0]
+        small = HashingEmbedder(dim=64).embed(["dimension check"])[0]
+        norm = math.sqrt(sum(v * v for v in vector))
+        if (isinstance(provider, HashingEmbedder) and len(vector) == LOCAL_EMBEDDING_DIM
+                and len(small) == 64 and abs(norm - 1.0) < 1e-6):
+            results.ok("hashing_embedder_dimension")
+        else:
+            results.fail("hashing_embedder_dimension", f"{provider.name}: dim {len(vector)}, norm {norm}")
+    except Exception as e:
+        results.fail("hashing_embedder_dimension", str(e))
+
+    # ═══════════════════════════════════════════════════════════
+    # INDEXING
+    # ═══════════════════════════════════════════════════════════
+    print("\n📚 Indexing:")
+
+    import iga_rag
+
+    write("notes/garden.md", "# Garden\n\nTomatoes need full sun and deep watering twice a week.\n")
+    write("notes/dispatch.md", "# Dispatch\n\nhandle_action dispatches every action the model asks for.\n")
+    write("notes/ledger.md", "# Ledger\n\n" + " ".join(f"entry {i} was reconciled against the monthly statement."
+                                                        for i in range(40))
+          + " Reference code zqxwvmarker appears once here.\n")
+    write("notes/obsolete.md", "# Obsolete\n\nThis page about carburetors will be deleted.\n")
+
+    try:
+        if not iga_rag.init_rag():
+            raise RuntimeError("init_rag failed")
+        stats = iga_rag.index_files()
+        if stats["indexed"] == 4 and not stats["errors"] and iga_rag.get_rag_status()["backend"] == "numpy":
+            results.ok("index_files_offline")
+        else:
+            results.fail("index_files_offline", f"stats {stats}")
+    except Exception as e:
+        results.fail("index_files_offline", str(e))
+
+    try:
+        stats = iga_rag.index_files()
+        if stats["indexed"] == 0 and stats["skipped"] >= 4:
+            results.ok("unchanged_files_skipped")
+        else:
+            results.fail("unchanged_files_skipped", f"stats {stats}")
+    except Exception as e:
+        results.fail("unchanged_files_skipped", str(e))
+
+    try:
+        os.remove("notes/obsolete.md")
+        stats = iga_rag.index_files()
+        sources = {item["source"] for item in iga_rag.retrieve_context("carburetors page deleted")}
+        if stats["removed"] == 1 and "notes/obsolete.md" not in sources and iga_rag._lexical.search("carburetors") == []:
+            results.ok("deleted_files_removed")
+        else:
+            results.fail("deleted_files_removed", f"stats {stats}, sources {sources}")
+    except Exception as e:
+        results.fail("deleted_files_removed", str(e))
+
+    # ═══════════════════════════════════════════════════════════
+    # RETRIEVAL
+    # ═══════════════════════════════════════════════════════════
+    print("\n🔍 Retrieval:")
+
+    # One rare token in a long chunk: too weak for the vector side, an exact hit for BM25
+    try:
+        query = "zqxwvmarker"
+        vector_sources = {os.path.normpath(m.get("source_file", "")) for _, _, m, _ in iga_rag._vector_candidates(query, 10)}
+        items = iga_rag.retrieve_context(query)
+        if "notes/ledger.md" in vector_sources:
+            results.fail("keyword_only_via_bm25", "the vector side found it too; not a BM25-only check")
+        elif not items or items[0]["source"] != "notes/ledger.md":
+            results.fail("keyword_only_via_bm25", f"got: {[i['source'] for i in items]}")
+        else:
+            results.ok("keyword_only_via_bm25")
+    except Exception as e:
+        results.fail("keyword_only_via_bm25", str(e))
+
+    # Reciprocal rank fusion: ranked first by both sides scores 1.0, by one side only about half
+    try:
+        items = iga_rag.retrieve_context("handle_action dispatches every action")
+        fused_top = items[0] if items else {}
+        lexical_only = iga_rag.retrieve_context("zqxwvmarker")[0]
+        if fused_top.get("source") != "notes/dispatch.md" or abs(fused_top["relevance"] - 1.0) > 1e-9:
+            results.fail("rrf_fusion", f"top: {fused_top}")
+        elif abs(lexical_only["relevance"] - 0.5) > 1e-9:
+            results.fail("rrf_fusion", f"single-side hit relevance {lexical_only['relevance']}")
+        else:
+            results.ok("rrf_fusion")
+    except Exception as e:
+        results.fail("rrf_fusion", str(e))
+
+finally:
+    leave_test_dir(TEST_DIR)
+
+success = results.summary()
+sys.exit(0 if success else 1)
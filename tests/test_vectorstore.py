@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test suite for the NumPy vector store (tombstones, reopen, compaction, crash recovery).
+Run with: python tests/test_vectorstore.py
+"""
+
+import sys
+import os
+
+from harness import TestResults, enter_test_dir, leave_test_dir
+
+results = TestResults()
+TEST_DIR = enter_test_dir()
+
+try:
+    # ═══════════════════════════════════════════════════════════
+    # NUMPY STORE
+    # ═══════════════════════════════════════════════════════════
+    print("\n🧮 NumPy Store:")
+
+    from iga_vectorstore import NumpyStore
+
+    def unit(i, dim=8):
+        """A distinct vector per i, so each query has one exact match."""
+        return [1.0 if d == i % dim else 0.1 * (i // dim) for d in range(dim)]
+
+    def add_docs(store, ids):
+        store.add([f"d{i}" for i in ids], [unit(i) for i in ids],
+                  [f"doc {i}" for i in ids], [{"n": i} for i in ids])
+
+    def top_id(store, i):
+        hits = store.query([unit(i)], n_results=1)["ids"][0]
+        return hits[0] if hits else None
+
+    # Upsert and delete tombstone rows; queries and get() skip them
+    try:
+        store = NumpyStore("vectors", "t")
+        add_docs(store, range(6))
+        store.upsert(["d1"], [unit(1)], ["doc 1 v2"], [{"n": 1}])
+        store.delete(["d2", "missing"])
+        dead = sum(1 for r in store._rows if r is None)
+        if store.count() != 5 or dead != 2:
+            results.fail("tombstones", f"count {store.count()}, dead rows {dead}")
+        elif store.get(ids=["d1", "d2"])["documents"] != ["doc 1 v2"]:
+            results.fail("tombstones", f"got: {store.get(ids=['d1', 'd2'])}")
+        elif top_id(store, 2) == "d2" or top_id(store, 3) != "d3":
+            results.fail("tombstones", "query returned a deleted row")
+        else:
+            results.ok("tombstones")
+    except Exception as e:
+        results.fail("tombstones", str(e))
+
+    # A fresh instance replays the log to the same state
+    try:
+        reopened = NumpyStore("vectors", "t")
+        if (reopened.count() == 5 and reopened.get(ids=["d1"])["documents"] == ["doc 1 v2"]
+                and top_id(reopened, 4) == "d4" and "d2" not in reopened.get()["ids"]):
+            results.ok("reopen_after_write")
+        else:
+            results.fail("reopen_after_write", f"got: {reopened.get()}")
+    except Exception as e:
+        results.fail("reopen_after_write", str(e))
+
+    # Enough tombstones from upserts swap in a new matrix generation
+    try:
+        store = NumpyStore("vectors", "c")
+        add_docs(store, range(4))
+        for _ in range(300):
+            store.upsert([f"d{i}" for i in range(4)], [unit(i) for i in range(4)],
+                         [f"doc {i}" for i in range(4)], [{"n": i} for i in range(4)])
+        matrices = sorted(f for f in os.listdir("vectors") if f.startswith("c.") and f.endswith(".f32"))
+        reopened = NumpyStore("vectors", "c")
+        if store._generation < 1 or matrices != [os.path.basename(store.matrix_path)]:
+            results.fail("compaction_generation", f"generation {store._generation}, files {matrices}")
+        elif len(store._rows) > 1000 + 2 * store.count():
+            results.fail("compaction_generation", f"{len(store._rows)} rows kept")
+        elif reopened.count() != 4 or [top_id(reopened, i) for i in range(4)] != ["d0", "d1", "d2", "d3"]:
+            results.fail("compaction_generation", "reopened store lost rows")
+        else:
+            results.ok("compaction_generation")
+    except Exception as e:
+        results.fail("compaction_generation", str(e))
+
+    # An interrupted compaction leaves the next generation's matrix behind: it's dropped
+    try:
+        orphan = os.path.join("vectors", f"c.{store._generation + 1}.f32")
+        with open(orphan, 'wb') as f:
+            f.write(b"\0" * 64)
+        reopened = NumpyStore("vectors", "c")
+        if os.path.exists(orphan) or reopened.count() != 4:
+            results.fail("compaction_crash_orphan", "orphaned matrix kept")
+        else:
+            results.ok("compaction_crash_orphan")
+    except Exception as e:
+        results.fail("compaction_crash_orphan", str(e))
+
+    # A crash mid-write: partial log record and matrix rows the log never recorded
+    try:
+        store = NumpyStore("vectors", "p")
+        add_docs(store, range(3))
+        with open(store.meta_path, 'a') as f:
+            f.write('{"op": "add", "rows": [{"id": "d9", "docu')
+        with open(store.matrix_path, 'ab') as f:
+            f.write(b"\0" * 4 * 8 * 2)
+        reopened = NumpyStore("vectors", "p")
+        with open(reopened.meta_path, 'rb') as f:
+            log = f.read()
+        if reopened.count() != 3 or not log.endswith(b"\n"):
+            results.fail("partial_record_truncated", f"count {reopened.count()}")
+        elif os.path.getsize(reopened.matrix_path) != 3 * 8 * 4:
+            results.fail("partial_record_truncated", "extra matrix rows kept")
+        else:
+            add_docs(reopened, [3])
+            again = NumpyStore("vectors", "p")
+            if again.count() == 4 and top_id(again, 3) == "d3":
+                results.ok("partial_record_truncated")
+            else:
+                results.fail("partial_record_truncated", "append after recovery lost")
+    except Exception as e:
+        results.fail("partial_record_truncated", str(e))
+
+finally:
+    leave_test_dir(TEST_DIR)
+
+success = results.summary()
+sys.exit(0 if success else 1)
@@ -6,30 +6,17 @@ Runs the auto-extractor over historical conversations
 to populate memories from past sessions.
 """
 
-import json
 import sys
 from pathlib import Path
 from datetime import datetime
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from tools.auto_extract import extract_from_messages, _save_extracts, ensure_dirs
+from tools.message_archive import iter_archive
 
-ARCHIVE = Path(__file__).parent.parent / "iga_message_archive.jsonl"
-
-def load_archive_messages():
-    """Load all messages from the archive."""
-    messages = []
-    with open(ARCHIVE) as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                msg = json.loads(line)
-                messages.append(msg)
-            except json.JSONDecodeError:
-                continue
-    return messages
+def load_archive_messages(since=None, until=None):
+    """Load messages from the archive, optionally only those archived in [since, until)."""
+    return list(iter_archive(since, until))
 
 def is_substantive(msg):
     """Filter out system noise - only keep real conversation."""
@@ -1,13 +1,44 @@
 #!/usr/bin/env python3
-"""Index message archive into RAG in meaningful chunks."""
+"""Index message archive into RAG in meaningful chunks.
+
+Incremental: a checkpoint (archive position + the messages of the unfinished
+chunk) is saved next to the collection, so each run only reads, chunks and
+embeds what was archived since the last one. Chunk ids are hashes of their
+messages, so they never shift.
+"""
 
 import json
 import os
 import sys
+import hashlib
+from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import iga_rag
-from iga_rag import init_rag, _embed_text
+from iga_rag import init_rag, upsert_chunks, _delete_chunks, _embed_texts
+from tools.message_archive import read_since, is_valid_position
+
+CHUNK_MESSAGES = 15
+CHECKPOINT_NAME = "archive_index_checkpoint"
+
+def is_interesting(msg):
+    """Filter out boring messages (NEXT_ACTION responses, etc.)"""
+    content = msg.get('content') or ''
+    # Skip very short or system-y messages
+    if len(content) < 50:
+        return False
+    if content.startswith('[') and content.endswith(']: NEXT_ACTION'):
+        return False
+    if content == 'NEXT_ACTION':
+        return False
+    return True
+
+def chunk_id(messages):
+    """Stable id derived from the chunk's messages."""
+    h = hashlib.sha1()
+    for msg in messages:
+        h.update(f"{msg.get('archived_at', '')}\0{msg.get('role', '')}\0{msg.get('content', '')}\0".encode('utf-8'))
+    return f"archive_{h.hexdigest()[:24]}"
 
 def chunk_messages(messages, chunk_size=20):
     """Group messages into chunks for indexing."""
@@ -16,21 +47,21 @@ def chunk_messages(messages, chunk_size=20):
         chunk = messages[i:i+chunk_size]
         if chunk:
             # Get date range
-            start_date = chunk[0].get('archived_at', '')[:10]
-            end_date = chunk[-1].get('archived_at', '')[:10]
-            
+            start_date = (chunk[0].get('archived_at') or '')[:10]
+            end_date = (chunk[-1].get('archived_at') or '')[:10]
+
             # Build text representation
             text_parts = [f"Messages from {start_date} to {end_date}:\n"]
             for msg in chunk:
                 role = msg.get('role', 'unknown')
-                content = msg.get('content', '')
+                content = msg.get('content') or ''
                 # Truncate very long messages
                 if len(content) > 500:
                     content = content[:500] + "..."
                 text_parts.append(f"[{role}]: {content}")
-            
+
             chunks.append({
-                'id': f"archive_{start_date}_{i}",
+                'id': chunk_id(chunk),
                 'text': "\n".join(text_parts),
                 'start_date': start_date,
                 'end_date': end_date,
@@ -38,81 +69,93 @@ def chunk_messages(messages, chunk_size=20):
             })
     return chunks
 
-def index_archive():
-    """Index the message archive into RAG."""
-    archive_path = "iga_message_archive.jsonl"
-    
-    if not os.path.exists(archive_path):
-        print("No message archive found")
-        return
-    
-    # Load messages
-    messages = []
-    with open(archive_path) as f:
-        for line in f:
-            line_content = line.strip()
-            if not line_content:
-                continue
-            try:
-                messages.append(json.loads(line_content))
-            except:
-                continue
-    
-    print(f"Loaded {len(messages)} messages")
-    
-    # Filter out boring messages (NEXT_ACTION responses, etc.)
-    interesting = []
-    for msg in messages:
-        content = msg.get('content', '')
-        # Skip very short or system-y messages
-        if len(content) < 50:
-            continue
-        if content.startswith('[') and content.endswith(']: NEXT_ACTION'):
-            continue
-        if content == 'NEXT_ACTION':
-            continue
-        interesting.append(msg)
-    
-    print(f"Filtered to {len(interesting)} interesting messages")
-    
-    # Chunk them
-    chunks = chunk_messages(interesting, chunk_size=15)
-    print(f"Created {len(chunks)} chunks")
-    
+def _checkpoint_file():
+    return iga_rag._store_file(CHECKPOINT_NAME)
+
+def _load_checkpoint():
+    try:
+        with open(_checkpoint_file(), 'r') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+def _save_checkpoint(position, carry):
+    path = _checkpoint_file()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({"position": list(position) if position else None, "carry": carry,
+                   "updated_at": datetime.now().isoformat()}, f)
+    os.replace(tmp_path, path)
+
+def _write_chunks(chunks):
+    """Embed and upsert chunks. Returns how many were written."""
+    embeddings = _embed_texts([chunk['text'][:8000] for chunk in chunks])  # Limit for embedding
+    rows = [(chunk, emb) for chunk, emb in zip(chunks, embeddings) if emb is not None]
+    if rows:
+        upsert_chunks(
+            ids=[chunk['id'] for chunk, _ in rows],
+            embeddings=[emb for _, emb in rows],
+            documents=[chunk['text'][:10000] for chunk, _ in rows],
+            metadatas=[{
+                'source_file': f"message_archive ({chunk['start_date']} to {chunk['end_date']})",
+                'start_date': chunk['start_date'],
+                'end_date': chunk['end_date'],
+                'message_count': chunk['message_count']
+            } for chunk, _ in rows]
+        )
+    if len(rows) < len(chunks):
+        # Don't move the checkpoint past them; the retry hits the embedding cache for the rest
+        raise RuntimeError(f"{len(chunks) - len(rows)} chunks failed to embed")
+    return len(rows)
+
+def index_archive(full=False):
+    """Index messages archived since the last run into RAG (everything if full)."""
     # Initialize RAG
     init_rag()
-    
+
     collection = iga_rag._collection
     if collection is None:
         print("Failed to initialize RAG")
         return
-    
-    # Index chunks
-    # Index chunks
-    indexed = 0
-    for chunk in chunks:
-        try:
-            embedding = _embed_text(chunk['text'][:8000])  # Limit for embedding
-            if embedding is None:
+
+    checkpoint = None if full else _load_checkpoint()
+    position = tuple(checkpoint["position"]) if checkpoint and checkpoint.get("position") else None
+    if checkpoint is None or (position and not is_valid_position(position)):
+        # First run, or the archive was rebuilt: drop every archive chunk and start over
+        existing = [i for i in (collection.get(include=[]).get('ids') or []) if i.startswith('archive_')]
+        _delete_chunks(existing)
+        if existing:
+            print(f"Removed {len(existing)} previously indexed archive chunks")
+        position, carry = None, []
+    else:
+        carry = checkpoint.get("carry", [])
+
+    scanned = indexed = 0
+    chunks = []
+    try:
+        for position, msg in read_since(position):
+            scanned += 1
+            if not is_interesting(msg):
                 continue
-            collection.upsert(
-                ids=[chunk['id']],
-                embeddings=[embedding],
-                documents=[chunk['text'][:10000]],
-                metadatas=[{
-                    'source_file': f"message_archive ({chunk['start_date']} to {chunk['end_date']})",
-                    'start_date': chunk['start_date'],
-                    'end_date': chunk['end_date'],
-                    'message_count': chunk['message_count']
-                }]
-            )
-            indexed += 1
-        except Exception as e:
-            print(f"Error indexing chunk: {e}")
-        except Exception as e:
-            print(f"Error indexing chunk: {e}")
-    
-    print(f"✅ Indexed {indexed} chunks from message archive")
+            carry.append({k: msg.get(k) for k in ('role', 'content', 'archived_at')})
+            if len(carry) < CHUNK_MESSAGES:
+                continue
+            chunks.extend(chunk_messages(carry, chunk_size=CHUNK_MESSAGES))
+            carry = []
+            if len(chunks) >= iga_rag.ADD_BATCH_SIZE:
+                indexed += _write_chunks(chunks)
+                chunks = []
+                _save_checkpoint(position, carry)
+        if chunks:
+            indexed += _write_chunks(chunks)
+        _save_checkpoint(position, carry)
+    except Exception as e:
+        print(f"Error indexing chunks: {e}")
+
+    print(f"✅ Indexed {indexed} chunks from {scanned} new archived messages "
+          f"({len(carry)} waiting for the next chunk)")
+    return {"messages": scanned, "chunks": indexed, "pending": len(carry)}
 
 if __name__ == "__main__":
-    index_archive()
\ No newline at end of file
+    index_archive(full="--full" in sys.argv)
@@ -14,21 +14,23 @@ Usage:
   python memory_consolidator.py surface    # Generate startup context
 """
 
-import json
 import os
 import sys
 from datetime import datetime
 
-MEMORY_FILE = "iga_memory.json"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from iga_memory import get_memory_store
+
+_loaded_keys = set()
 
 def load_memory():
-    with open(MEMORY_FILE, 'r') as f:
-        content = f.read().strip()
-        return json.loads(content) if content else {}
+    mem = get_memory_store().all()
+    _loaded_keys.update(mem)
+    return mem
 
 def save_memory(mem):
-    with open(MEMORY_FILE, 'w') as f:
-        json.dump(mem, f, indent=2)
+    """Write back mem; keys that were loaded but are gone from it are deleted."""
+    get_memory_store().merge(mem, delete=_loaded_keys - set(mem))
 
 def analyze():
     """Analyze memory structure and find issues."""
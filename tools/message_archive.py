@@ -1,38 +1,570 @@
 """
 Message Archive System for Iga
 Archives all conversation messages permanently before they get summarized.
+
+Layout:
+  iga_message_archive/
+    catalog.json              - every segment's time range, message count and size
+    2026-02-14_000.jsonl.gz   - closed segments (gzip, immutable)
+    2026-02-15_000.jsonl      - the active segment, appended to
+  iga_message_archive.db      - SQLite + FTS5 index over all segments (rebuildable)
+
+Segments rotate daily or at SEGMENT_MAX_BYTES, whichever comes first; the
+rotated-out segment is compressed. Range readers consult the catalog and
+open only the segments that overlap.
+
+Writes go through a buffered, group-commit ArchiveWriter. Conversation
+messages carry a sequence "id"; the catalog keeps the highest id archived
+so far, and messages at or below it are never written again.
 """
 
+import atexit
+import gzip
 import json
 import os
+import shutil
+import sqlite3
+import threading
+import time
 from datetime import datetime
 
-ARCHIVE_FILE = "iga_message_archive.jsonl"  # JSON Lines format - one message per line
+ARCHIVE_DIR = "iga_message_archive"
+CATALOG_FILE = os.path.join(ARCHIVE_DIR, "catalog.json")
+SEGMENT_MAX_BYTES = 8 * 1024 * 1024  # uncompressed
+ARCHIVE_DB_FILE = "iga_message_archive.db"  # SQLite + FTS5 index over the archive (rebuildable)
+DB_SCHEMA_VERSION = 2
+INGEST_BATCH = 5000
+FLUSH_MAX_ENTRIES = 64        # write a batch once this many messages are buffered...
+FLUSH_INTERVAL_SECONDS = 2.0  # ...or the oldest has waited this long
+FSYNC_POLICIES = ("never", "batch", "always")
 
-def archive_messages(messages):
+# Pre-segment layout, migrated into segments on first use
+LEGACY_ARCHIVE_FILE = "iga_message_archive.jsonl"
+LEGACY_META_FILE = "iga_message_archive.meta.json"
+
+_archive_lock = threading.Lock()
+_catalog = None
+_catalog_mtime = None
+_db = None
+_db_has_fts = False
+_writer = None
+_writer_lock = threading.Lock()
+
+def _to_iso(value):
+    if value is None or isinstance(value, str):
+        return value
+    return value.isoformat()
+
+# ── Catalog ──────────────────────────────────────────────────
+# {"segments": [...], "high_water": last archived message id}
+# Entry: {"name", "closed", "start", "end", "count", "bytes"}; bytes is the
+# uncompressed size, so it doubles as the append checkpoint for the active
+# segment. Only the last segment can be open.
+
+def _load_catalog():
+    """Cached catalog, reloaded if another process rewrote it. Caller holds _archive_lock."""
+    global _catalog, _catalog_mtime
+    try:
+        mtime = os.path.getmtime(CATALOG_FILE)
+    except OSError:
+        mtime = None
+    if _catalog is None or mtime != _catalog_mtime:
+        _catalog = {"segments": []}
+        if mtime is not None:
+            try:
+                with open(CATALOG_FILE, 'r') as f:
+                    _catalog = json.load(f)
+            except Exception as e:
+                print(f"Warning: Could not read archive catalog: {e}")
+        _catalog_mtime = mtime
+    return _catalog
+
+def _save_catalog():
+    global _catalog_mtime
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    tmp_path = CATALOG_FILE + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(_catalog, f, indent=1)
+    os.replace(tmp_path, CATALOG_FILE)
+    _catalog_mtime = os.path.getmtime(CATALOG_FILE)
+
+def _segment_path(seg, closed=None):
+    closed = seg["closed"] if closed is None else closed
+    return os.path.join(ARCHIVE_DIR, seg["name"] + (".jsonl.gz" if closed else ".jsonl"))
+
+def _open_segment(seg):
+    if not seg["closed"]:
+        try:
+            return open(_segment_path(seg), 'rb')
+        except FileNotFoundError:
+            pass  # compressed since our catalog snapshot
+    return gzip.open(_segment_path(seg, closed=True), 'rb')
+
+def _iter_lines(seg, offset=0):
+    """Yield (end_offset, line) for each complete line after offset (uncompressed bytes)."""
+    with _open_segment(seg) as f:
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break  # partial line still being written
+            offset += len(raw)
+            yield offset, raw
+
+def _active_segment(catalog):
+    segments = catalog["segments"]
+    return segments[-1] if segments and not segments[-1]["closed"] else None
+
+def _new_segment_name(catalog, day):
+    seq = sum(1 for s in catalog["segments"] if s["name"].startswith(day + "_"))
+    return f"{day}_{seq:03d}"
+
+def _count_lines(path, offset=0):
+    """Count newline-terminated lines from offset to end of file."""
+    count = 0
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for block in iter(lambda: f.read(1 << 20), b""):
+            count += block.count(b"\n")
+    return count
+
+def _sync_active(catalog):
+    """Bring the active segment's count up to date if it was appended to behind our back."""
+    active = _active_segment(catalog)
+    if active is None:
+        return
+    path = _segment_path(active)
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    if size == active["bytes"]:
+        return
+    if size > active["bytes"]:
+        active["count"] += _count_lines(path, active["bytes"])
+    else:
+        active["count"] = _count_lines(path) if size else 0
+    active["bytes"] = size
+    _save_catalog()
+
+def _close_segment(seg):
+    """Compress the active segment and mark it closed."""
+    src = _segment_path(seg, closed=False)
+    dst = _segment_path(seg, closed=True)
+    with open(src, 'rb') as f_in, gzip.open(dst + ".tmp", 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.replace(dst + ".tmp", dst)
+    seg["closed"] = True
+    _save_catalog()
+    os.remove(src)
+
+def _migrate_legacy(catalog):
+    """Split the old single-file archive into closed, compressed daily segments."""
+    segments = []
+    current = out = None
+    last_day = datetime.fromtimestamp(os.path.getmtime(LEGACY_ARCHIVE_FILE)).date().isoformat()
+    planned = {"segments": list(catalog["segments"])}
+    try:
+        with open(LEGACY_ARCHIVE_FILE, 'rb') as f:
+            for raw in f:
+                if not raw.strip():
+                    continue
+                if not raw.endswith(b"\n"):
+                    raw += b"\n"
+                try:
+                    archived_at = json.loads(raw).get("archived_at")
+                except (json.JSONDecodeError, AttributeError):
+                    archived_at = None  # keep the line, file it with its neighbours
+                day = archived_at[:10] if archived_at else last_day
+                if current is None or day != current["name"][:10]:
+                    if out:
+                        out.close()
+                    current = {"name": _new_segment_name(planned, day), "closed": True,
+                               "start": archived_at, "end": archived_at, "count": 0, "bytes": 0}
+                    planned["segments"].append(current)
+                    segments.append(current)
+                    out = gzip.open(_segment_path(current), 'wb')
+                out.write(raw)
+                current["count"] += 1
+                current["bytes"] += len(raw)
+                current["start"] = current["start"] or archived_at
+                current["end"] = archived_at or current["end"]
+                last_day = day
+    finally:
+        if out:
+            out.close()
+
+    # Closed history goes ahead of any segment still being appended to
+    at = len(catalog["segments"]) - (1 if _active_segment(catalog) else 0)
+    catalog["segments"][at:at] = segments
+    _save_catalog()
+    os.remove(LEGACY_ARCHIVE_FILE)
+    if os.path.exists(LEGACY_META_FILE):
+        os.remove(LEGACY_META_FILE)
+    print(f"📦 Migrated message archive into {len(segments)} compressed segments")
+
+def _catalog_state():
+    """Current catalog: migrated, with the active segment synced. Caller holds _archive_lock."""
+    catalog = _load_catalog()
+    if os.path.exists(LEGACY_ARCHIVE_FILE):
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        _migrate_legacy(catalog)
+    _sync_active(catalog)
+    return catalog
+
+def get_archive_count():
+    """Number of archived messages, in O(1) from the catalog."""
+    flush_archive()
+    with _archive_lock:
+        return sum(s["count"] for s in _catalog_state()["segments"])
+
+def get_high_water():
+    """Highest message id archived so far (0 if none), counting buffered ones."""
+    if _writer is not None:
+        return _writer.high_water()
+    with _archive_lock:
+        return _catalog_state().get("high_water", 0)
+
+def mark_archived(message_id):
+    """Record that messages up to message_id are already in the archive."""
+    with _archive_lock:
+        catalog = _catalog_state()
+        if message_id > catalog.get("high_water", 0):
+            catalog["high_water"] = message_id
+            _save_catalog()
+    if _writer is not None:
+        _writer.advance(message_id)
+
+def get_segments():
+    """Snapshot of the catalog's segment list (oldest first)."""
+    flush_archive()
+    with _archive_lock:
+        return [dict(s) for s in _catalog_state()["segments"]]
+
+def iter_archive(since=None, until=None):
+    """Yield archived messages, oldest first, optionally within [since, until).
+
+    since/until are ISO timestamps, dates or datetimes. Only segments whose
+    time range overlaps are opened.
     """
-    Archive messages to permanent storage.
-    Uses JSON Lines format for efficient appending without loading entire file.
+    since, until = _to_iso(since), _to_iso(until)
+    for seg in get_segments():
+        if since and seg["end"] and seg["end"] < since:
+            continue
+        if until and seg["start"] and seg["start"] >= until:
+            continue
+        try:
+            for _, raw in _iter_lines(seg):
+                try:
+                    msg = json.loads(raw)
+                except json.JSONDecodeError:
+                    continue
+                archived_at = msg.get("archived_at") or ""
+                if (since and archived_at < since) or (until and archived_at >= until):
+                    continue
+                yield msg
+        except FileNotFoundError:
+            print(f"Warning: Archive segment missing: {seg['name']}")
+
+def read_since(position=None):
+    """Yield (position, message) for each message after position, oldest first.
+
+    A position is (segment name, uncompressed byte offset) and marks the end
+    of the message it comes with, so incremental consumers can checkpoint it
+    and resume exactly there. None starts from the beginning.
     """
-    if not messages:
-        return
-    
+    start_name, start_offset = position or (None, 0)
+    started = start_name is None
+    for seg in get_segments():
+        offset = 0
+        if not started:
+            if seg["name"] != start_name:
+                continue
+            started, offset = True, start_offset
+        for offset, raw in _iter_lines(seg, offset):
+            try:
+                msg = json.loads(raw)
+            except json.JSONDecodeError:
+                continue
+            yield (seg["name"], offset), msg
+
+def is_valid_position(position):
+    """Whether a saved read_since position still points into the archive."""
+    if not position:
+        return False
+    name, offset = position
+    return any(s["name"] == name and offset <= s["bytes"] for s in get_segments())
+
+# ── SQLite index ─────────────────────────────────────────────
+# The segments stay the source of truth. The database records how far into
+# each segment it has ingested, so anything appended by other processes is
+# caught up lazily and deleting the .db just rebuilds it on next use.
+
+def _create_schema(conn):
+    global _db_has_fts
+    if conn.execute("PRAGMA user_version").fetchone()[0] != DB_SCHEMA_VERSION:
+        for table in ("messages_fts", "messages", "state", "ingested"):
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.execute(f"PRAGMA user_version = {DB_SCHEMA_VERSION}")
+    conn.execute("CREATE TABLE IF NOT EXISTS messages ("
+                 "id INTEGER PRIMARY KEY, role TEXT, content TEXT, archived_at TEXT)")
+    conn.execute("CREATE TABLE IF NOT EXISTS ingested ("
+                 "segment TEXT PRIMARY KEY, byte_offset INTEGER, done INTEGER)")
     try:
-        with open(ARCHIVE_FILE, 'a') as f:
+        # Trigram tokens make MATCH a case-insensitive substring search, like the old scan
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+                     "content, content='messages', content_rowid='id', tokenize='trigram')")
+        _db_has_fts = True
+    except sqlite3.OperationalError:
+        _db_has_fts = False  # SQLite built without FTS5/trigram - fall back to LIKE
+    conn.commit()
+
+
+def _get_db():
+    """Open the archive database and catch it up with the segments. Caller holds _archive_lock."""
+    global _db
+    if _db is None:
+        conn = sqlite3.connect(ARCHIVE_DB_FILE, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _create_schema(conn)
+        _db = conn
+    _ingest(_db, _catalog_state())
+    return _db
+
+
+def _reset_db(conn):
+    with conn:
+        conn.execute("DELETE FROM messages")
+        if _db_has_fts:
+            conn.execute("INSERT INTO messages_fts(messages_fts) VALUES ('delete-all')")
+        conn.execute("DELETE FROM ingested")
+
+
+def _insert_rows(conn, rows, segment, offset, done):
+    with conn:
+        for role, content, archived_at in rows:
+            cur = conn.execute("INSERT INTO messages (role, content, archived_at) VALUES (?, ?, ?)",
+                               (role, content, archived_at))
+            if _db_has_fts:
+                conn.execute("INSERT INTO messages_fts (rowid, content) VALUES (?, ?)",
+                             (cur.lastrowid, content))
+        conn.execute("INSERT OR REPLACE INTO ingested (segment, byte_offset, done) VALUES (?, ?, ?)",
+                     (segment, offset, int(done)))
+
+
+def _ingest(conn, catalog):
+    """Index complete lines the database hasn't seen yet."""
+    progress = {name: (offset, done) for name, offset, done in
+                conn.execute("SELECT segment, byte_offset, done FROM ingested")}
+    names = {s["name"] for s in catalog["segments"]}
+    if any(name not in names for name in progress) or any(
+            progress.get(s["name"], (0, 0))[0] > s["bytes"] for s in catalog["segments"]):
+        _reset_db(conn)  # segments removed or truncated - rebuild
+        progress = {}
+
+    for seg in catalog["segments"]:
+        offset, done = progress.get(seg["name"], (0, 0))
+        if done or (offset == seg["bytes"] and not seg["closed"]):
+            continue
+        rows = []
+        for offset, raw in _iter_lines(seg, offset):
+            try:
+                msg = json.loads(raw)
+            except json.JSONDecodeError:
+                continue
+            content = msg.get("content")
+            if not isinstance(content, str):
+                content = json.dumps(content) if content is not None else ""
+            rows.append((msg.get("role"), content, msg.get("archived_at")))
+            if len(rows) >= INGEST_BATCH:
+                _insert_rows(conn, rows, seg["name"], offset, False)
+                rows = []
+        _insert_rows(conn, rows, seg["name"], offset, seg["closed"])
+
+
+def _row_to_message(row):
+    role, content, archived_at = row
+    return {"role": role, "content": content, "archived_at": archived_at}
+
+
+def _write_entries(entries, fsync=False):
+    """Append prepared entries to the active segment, rotating first if it's due."""
+    with _archive_lock:
+        catalog = _catalog_state()
+        high_water = catalog.get("high_water", 0)
+        entries = [e for e in entries if e.get("id") is None or e["id"] > high_water]
+        if not entries:
+            return
+        today = datetime.now().date().isoformat()
+        active = _active_segment(catalog)
+        if active and (active["name"][:10] != today or active["bytes"] >= SEGMENT_MAX_BYTES):
+            _close_segment(active)
+            active = None
+        if active is None:
+            os.makedirs(ARCHIVE_DIR, exist_ok=True)
+            active = {"name": _new_segment_name(catalog, today), "closed": False,
+                      "start": None, "end": None, "count": 0, "bytes": 0}
+            catalog["segments"].append(active)
+
+        data = "".join(json.dumps(entry) + "\n" for entry in entries).encode('utf-8')
+        with open(_segment_path(active), 'ab') as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        active["count"] += len(entries)
+        active["bytes"] = os.path.getsize(_segment_path(active))
+        active["start"] = active["start"] or entries[0]["archived_at"]
+        active["end"] = entries[-1]["archived_at"]
+        ids = [e["id"] for e in entries if e.get("id") is not None]
+        if ids:
+            catalog["high_water"] = max(high_water, max(ids))
+        _save_catalog()
+        try:
+            _get_db()
+        except Exception as e:
+            print(f"Warning: Could not update archive index: {e}")
+
+
+class ArchiveWriter:
+    """Group-commit writer: buffers entries and appends them in batches.
+
+    A background thread writes a batch once max_entries are pending or the
+    oldest pending entry is interval seconds old, so callers never wait on
+    disk and a crash loses at most one window. fsync policy:
+      "never"  - leave durability to the OS
+      "batch"  - fsync after each batch (default)
+      "always" - write and fsync synchronously inside every submit()
+    """
+
+    def __init__(self, max_entries=FLUSH_MAX_ENTRIES, interval=FLUSH_INTERVAL_SECONDS, fsync=None):
+        self.fsync = (fsync or os.getenv("IGA_ARCHIVE_FSYNC", "batch")).strip().lower()
+        if self.fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {self.fsync} (expected one of {', '.join(FSYNC_POLICIES)})")
+        self.max_entries = max_entries
+        self.interval = interval
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()  # one batch on disk at a time, in order
+        self._pending = []
+        self._oldest = None  # monotonic time the oldest pending entry arrived
+        self._closed = False
+        self._thread = None
+        with _archive_lock:
+            self._high_water = _catalog_state().get("high_water", 0)
+
+    def high_water(self):
+        """Highest message id accepted, written or not."""
+        with self._cond:
+            return self._high_water
+
+    def advance(self, message_id):
+        with self._cond:
+            self._high_water = max(self._high_water, message_id)
+
+    def submit(self, messages):
+        """Queue messages for archiving; returns without touching disk (unless fsync="always")."""
+        archived_at = datetime.now().isoformat()
+        with self._cond:
+            entries = []
             for msg in messages:
                 # Skip system messages - they're always the same
                 if msg.get("role") == "system":
                     continue
-                
-                # Add timestamp if not present
-                archive_entry = {
-                    "role": msg.get("role"),
-                    "content": msg.get("content"),
-                    "archived_at": datetime.now().isoformat()
-                }
-                
-                f.write(json.dumps(archive_entry) + "\n")
-        
+                message_id = msg.get("id")
+                if message_id is not None:
+                    if message_id <= self._high_water:
+                        continue
+                    self._high_water = message_id
+                entry = {"role": msg.get("role"), "content": msg.get("content"), "archived_at": archived_at}
+                if message_id is not None:
+                    entry["id"] = message_id
+                entries.append(entry)
+            if not entries:
+                return
+            self._pending.extend(entries)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if self.fsync != "always" and self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="archive-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        if self.fsync == "always" or self._closed:
+            self.flush()
+
+    def flush(self):
+        """Write everything pending now."""
+        with self._flush_lock:
+            with self._cond:
+                batch, self._pending, self._oldest = self._pending, [], None
+            if not batch:
+                return
+            try:
+                _write_entries(batch, fsync=self.fsync != "never")
+            except Exception as e:
+                print(f"Warning: Could not archive messages: {e}")
+                with self._cond:  # keep them for the next attempt
+                    self._pending[:0] = batch
+                    self._oldest = time.monotonic()
+
+    def _due(self):
+        return bool(self._pending) and (len(self._pending) >= self.max_entries or
+                                        time.monotonic() - self._oldest >= self.interval)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and not self._due():
+                    timeout = self.interval - (time.monotonic() - self._oldest) if self._pending else None
+                    self._cond.wait(timeout)
+                if self._closed:
+                    return
+            self.flush()
+
+    def close(self):
+        """Stop the writer thread and flush what's left. Safe to call twice."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=5)
+        self.flush()
+
+
+def get_writer():
+    """The process-wide archive writer, flushed on shutdown and at exit."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ArchiveWriter()
+            try:
+                from tools.shutdown_handler import register_shutdown_callback
+                register_shutdown_callback(_writer.close)
+            except ImportError:
+                pass
+            atexit.register(_writer.close)
+        return _writer
+
+
+def flush_archive():
+    """Write any buffered messages so readers see them."""
+    if _writer is not None:
+        _writer.flush()
+
+
+def archive_messages(messages):
+    """
+    Archive messages to permanent storage.
+    Hands them to the buffered writer, which appends JSON lines to the active
+    segment in batches, rotating (and compressing the old one) at day
+    boundaries or SEGMENT_MAX_BYTES.
+
+    Messages with an "id" at or below the high-water mark are skipped, so
+    callers can pass overlapping batches. Messages without an id are always
+    written.
+    """
+    if not messages:
+        return
+
+    try:
+        get_writer().submit(messages)
         return True
     except Exception as e:
         print(f"Warning: Could not archive messages: {e}")
@@ -40,73 +572,55 @@ def archive_messages(messages):
 
 def get_archive_stats():
     """Get statistics about the archive."""
-    if not os.path.exists(ARCHIVE_FILE):
-        return {"total_messages": 0, "file_size": 0}
-    
     try:
-        with open(ARCHIVE_FILE, 'r') as f:
-            lines = f.readlines()
-        
-        file_size = os.path.getsize(ARCHIVE_FILE)
-        
+        segments = get_segments()
+        if not segments:
+            return {"total_messages": 0, "file_size": 0}
+        file_size = sum(os.path.getsize(_segment_path(s)) for s in segments
+                        if os.path.exists(_segment_path(s)))
+        raw_size = sum(s["bytes"] for s in segments)
+
         return {
-            "total_messages": len(lines),
+            "total_messages": sum(s["count"] for s in segments),
             "file_size": file_size,
-            "file_size_mb": round(file_size / (1024 * 1024), 2)
+            "file_size_mb": round(file_size / (1024 * 1024), 2),
+            "uncompressed_mb": round(raw_size / (1024 * 1024), 2),
+            "segments": len(segments),
         }
     except Exception:
         return {"total_messages": 0, "file_size": 0, "error": True}
 
 def search_archive(query, limit=50):
-    """Search the archive for messages containing a query."""
-    if not os.path.exists(ARCHIVE_FILE):
-        return []
-    
-    results = []
-    query_lower = query.lower()
-    
+    """Search the archive for messages containing a query (case-insensitive), oldest first."""
     try:
-        with open(ARCHIVE_FILE, 'r') as f:
-            for line in f:
-                line_content = line.strip()
-                if not line_content:
-                    continue
-                try:
-                    msg = json.loads(line_content)
-                    content = msg.get("content", "")
-                    if query_lower in content.lower():
-                        results.append(msg)
-                        if len(results) >= limit:
-                            break
-                except json.JSONDecodeError:
-                    continue
-        
-        return results
+        flush_archive()
+        with _archive_lock:
+            conn = _get_db()
+            if _db_has_fts and len(query) >= 3:
+                phrase = '"' + query.replace('"', '""') + '"'
+                rows = conn.execute(
+                    "SELECT m.role, m.content, m.archived_at FROM messages m JOIN ("
+                    "  SELECT rowid FROM messages_fts WHERE messages_fts MATCH ? ORDER BY rowid LIMIT ?"
+                    ") hits ON m.id = hits.rowid ORDER BY m.id",
+                    (phrase, limit)).fetchall()
+            else:
+                # Trigram FTS can't match under 3 characters
+                pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                rows = conn.execute(
+                    "SELECT role, content, archived_at FROM messages "
+                    "WHERE content LIKE ? ESCAPE '\\' ORDER BY id LIMIT ?",
+                    (pattern, limit)).fetchall()
+        return [_row_to_message(row) for row in rows]
     except Exception:
         return []
 
 def get_recent_archived(n=100):
     """Get the n most recent archived messages."""
-    if not os.path.exists(ARCHIVE_FILE):
-        return []
-    
     try:
-        # Read all lines and take last n
-        with open(ARCHIVE_FILE, 'r') as f:
-            lines = f.readlines()
-        
-        recent_lines = lines[-n:]
-        messages = []
-        
-        for line in recent_lines:
-            line_content = line.strip()
-            if not line_content:
-                continue
-            try:
-                messages.append(json.loads(line_content))
-            except json.JSONDecodeError:
-                continue
-        
-        return messages
+        flush_archive()
+        with _archive_lock:
+            rows = _get_db().execute(
+                "SELECT role, content, archived_at FROM messages ORDER BY id DESC LIMIT ?", (n,)).fetchall()
+        return [_row_to_message(row) for row in reversed(rows)]
     except Exception:
-        return []
\ No newline at end of file
+        return []
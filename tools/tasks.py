@@ -37,6 +37,9 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import uuid
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from iga_state import get_store as get_state_store
+
 TASKS_FILE = Path(__file__).parent.parent / "data" / "tasks.json"
 STATE_FILE = Path(__file__).parent.parent / "iga_state.json"
 
@@ -70,22 +73,18 @@ def save_tasks(data):
 
 
 def load_state():
-    if STATE_FILE.exists():
-        content = STATE_FILE.read_text().strip()
-        return json.loads(content) if content else {}
-    return {}
+    return get_state_store(STATE_FILE).get()
 
 
 def save_state(state):
-    STATE_FILE.write_text(json.dumps(state, indent=2))
+    get_state_store(STATE_FILE).set(state)
 
 
 def sync_to_iga_state(data):
     """Sync focused task to iga_state.json current_task field."""
-    state = load_state()
     focused = get_task_by_id(data, data.get("focused_id"))
-    state["current_task"] = focused["title"] if focused else None
-    save_state(state)
+    # Single-key atomic update - never clobbers mode/sleep changes made by main.py
+    get_state_store(STATE_FILE).update(current_task=focused["title"] if focused else None)
 
 
 def get_task_by_id(data, task_id):
@@ -13,11 +13,13 @@ One function. One file read. One coherent context.
 """
 
 import os
+import sys
 import json
 import random
 from datetime import datetime, timedelta
 
-MEMORY_FILE = "iga_memory.json"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from iga_memory import get_memory_store
 
 # Memory keys in priority order (highest first)
 CORE_KEYS = [
@@ -36,20 +38,18 @@ RECENT_KEYS_PATTERN = [
 ]
 
 def load_all_memory():
-    """Load memory file once, return dict."""
-    if not os.path.exists(MEMORY_FILE):
-        return {}
+    """Snapshot of the memory store as a dict."""
     try:
-        with open(MEMORY_FILE, 'r') as f:
-            content = f.read().strip()
-            return json.loads(content) if content else {}
+        return get_memory_store().all()
     except Exception:
         return {}
 
-def get_recent_entries(mem, days=3):
-    """Get memory entries from the last N days."""
+def get_recent_entries(mem=None, days=3):
+    """Get memory entries from the last N days (from the store's ts index unless mem is given)."""
     recent = []
     cutoff = datetime.now() - timedelta(days=days)
+    if mem is None:
+        mem = get_memory_store().between(cutoff)
 
     for key, val in mem.items():
         if not isinstance(val, dict):
@@ -127,7 +127,7 @@ def generate_unified_startup():
             sections.append(f"=== {key.upper().replace('_', ' ')} ===\n{content}")
 
     # === RECENT CONTEXT (last 3 days) ===
-    recent = get_recent_entries(mem, days=3)
+    recent = get_recent_entries(days=3)
     if recent:
         recent_section = "=== RECENT ACTIVITY ===\n"
         for key, value, ts in recent[-5:]:  # Last 5 entries
@@ -177,14 +177,9 @@ def generate_unified_startup():
 # Individual loaders for backward compatibility
 # (These are now just wrappers that use the unified loader)
 
-_cached_memory = None
-
 def _get_memory():
-    """Get memory with caching (loaded once per startup)."""
-    global _cached_memory
-    if _cached_memory is None:
-        _cached_memory = load_all_memory()
-    return _cached_memory
+    """Current memories (the store keeps them cached in memory)."""
+    return load_all_memory()
 
 def load_core_identity():
     mem = _get_memory()
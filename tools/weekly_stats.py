@@ -38,8 +38,8 @@ def get_weekly_stats():
     
     # Message archive count
     try:
-        with open('iga_message_archive.jsonl') as f:
-            messages = len(f.readlines())
+        from tools.message_archive import get_archive_count
+        messages = get_archive_count()
     except:
         messages = '?'
     